@@ -3,10 +3,15 @@ MicroPython firmware for Raspberry Pi Pico - OpenTrons Custom Serial Module
 
 This firmware demonstrates the JSON command protocol expected by the
 OpenTrons custom serial module. It handles basic commands and responds
-with JSON formatted messages.
+with JSON formatted messages. If the cbor2 package from micropython-lib is
+installed, the host can switch the link to CBOR with a SET_WIRE command.
+SET_WIRE can also switch from newline-terminated messages to length-prefixed
+frames (<4-byte little-endian length><payload>), which are read in one go.
+A list of commands is handled as a batch and answered with a list of
+responses in the same order.
 
 Hardware: Raspberry Pi Pico
-Communication: 115200 baud, JSON over USB serial
+Communication: 115200 baud, JSON (or CBOR) over USB serial
 MicroPython: Version 1.20+
 
 Installation:
@@ -18,9 +23,15 @@ Installation:
 import json
 import time
 import machine
+import micropython
 import sys
 from machine import Pin
 
+try:
+    import cbor2  # mip.install("cbor2")
+except ImportError:
+    cbor2 = None
+
 # Device information
 DEVICE_NAME = "Pi Pico Custom Module"
 FIRMWARE_VERSION = "1.0.0"
@@ -29,16 +40,102 @@ API_VERSION = "1.0"
 # Built-in LED for status indication
 led = Pin(25, Pin.OUT)
 
+# Internal temperature sensor, created once to avoid a heap allocation per read
+temp_sensor = machine.ADC(4)
+
+# Pre-bound to skip the `time` attribute lookup on every call
+ticks_ms = time.ticks_ms
+ticks_diff = time.ticks_diff
+
 # Status variables
 is_connected = False
-start_time = time.ticks_ms()
+start_time = ticks_ms()
 temperature = 25.0
 humidity = 50.0
 
+def constant(response):
+    """A response that never changes, as (JSON text encoded once, dict)."""
+    return json.dumps(response), response
+
+def reply(response):
+    """The form of a constant response the active wire format sends as-is.
+    
+    JSON links write the pre-encoded text straight out; CBOR links encode
+    the dict, rather than parsing the text back first.
+    """
+    return response[1] if wire_format == "cbor" else response[0]
+
+# Responses that never change, encoded once at import
+CONNECT_RESPONSE = constant({
+    "status": "success",
+    "message": f"Connected to {DEVICE_NAME}",
+    "data": {
+        "device_name": DEVICE_NAME,
+        "firmware_version": FIRMWARE_VERSION
+    }
+})
+DISCONNECT_RESPONSE = constant({
+    "status": "success",
+    "message": f"Disconnected from {DEVICE_NAME}"
+})
+RESET_RESPONSE = constant({
+    "status": "success",
+    "message": f"{DEVICE_NAME} reset successfully"
+})
+VERSION_RESPONSE = constant({
+    "status": "success",
+    "message": "Version information retrieved",
+    "data": {
+        "device_name": DEVICE_NAME,
+        "firmware_version": FIRMWARE_VERSION,
+        "api_version": API_VERSION,
+        "micropython_version": sys.version,
+        "platform": "Raspberry Pi Pico"
+    }
+})
+ERROR_TEMPLATE = '{"status": "error", "message": %s}'
+INVALID_JSON_RESPONSE = ERROR_TEMPLATE % '"Invalid JSON format"'
+INVALID_CBOR_RESPONSE = {"status": "error", "message": "Invalid CBOR format"}
+BATCH_TEMPLATE = '{"id": %s, "batch": %s}'
+
+# Fixed-shape JSON responses filled in with % formatting instead of
+# json.dumps; CBOR links build the dict instead
+STATUS_TEMPLATE = (
+    '{"status": "success", "message": "Device status retrieved", "data": '
+    '{"connected": %s, "temperature": %.2f, "humidity": %.2f, '
+    '"uptime": %d, "led_state": %d}}'
+)
+RESULTS_TEMPLATE = (
+    '{"status": "success", "message": "Measurement results retrieved", "data": '
+    '{"temperature": %.2f, "humidity": %.2f, "internal_temperature": %.2f, '
+    '"uptime": %d}}'
+)
+
+# Active wire format and framing; SET_WIRE changes them after its reply
+wire_format = "json"
+framing = "line"
+pending_wire = None
+
+# Largest length-prefixed frame accepted (matches the host's MAX_FRAME_SIZE)
+MAX_FRAME_SIZE = 65536
+
+# Preallocated receive buffer for length-prefixed frames
+frame_buffer = bytearray(1024)
+frame_view = memoryview(frame_buffer)
+
+@micropython.viper
+def adc_to_centi_c(raw: int) -> int:
+    """Convert a raw internal temperature sensor reading to centi-degrees C.
+    
+    Integer-only form of 27 - (raw * 3.3 / 65535 - 0.706) / 0.001721, so it
+    compiles to plain machine arithmetic under viper.
+    """
+    return 43723 - ((raw * 11985) >> 12)
+
 def setup():
     """Initialize the device."""
     global start_time
-    start_time = time.ticks_ms()
+    start_time = ticks_ms()
     led.off()
     
     # Send ready message
@@ -51,105 +148,112 @@ def handle_command(command_dict):
     """Handle incoming command and return response."""
     command = command_dict.get("command", "").upper()
     
-    if command == "CONNECT":
-        return handle_connect()
-    elif command == "DISCONNECT":
-        return handle_disconnect()
-    elif command == "STATUS":
-        return handle_status()
-    elif command == "RESET":
-        return handle_reset()
-    elif command == "GET_VERSION":
-        return handle_get_version()
-    elif command == "SET_PARAMETER":
-        return handle_set_parameter(command_dict)
-    elif command == "GET_PARAMETER":
-        return handle_get_parameter(command_dict)
-    elif command == "CUSTOM_MEASUREMENT":
-        return handle_custom_measurement(command_dict)
-    elif command == "START_MEASUREMENT":
-        return handle_start_measurement(command_dict)
-    elif command == "GET_RESULTS":
-        return handle_get_results()
-    elif command == "BLINK_LED":
-        return handle_blink_led(command_dict)
-    else:
+    handler = _DISPATCH.get(command)
+    if handler is None:
         return handle_unknown_command(command)
+    return handler(command_dict)
+
+def handle_message(message):
+    """Handle a single command, or a batch of commands sent as a list.
+    
+    A batch that needs an id arrives as {"id": ..., "batch": [...]} and its
+    responses go back wrapped the same way.
+    """
+    if isinstance(message, list):
+        return handle_batch(message)
+    
+    command_id = message.get("id")
+    if "batch" in message:
+        responses = handle_batch(message["batch"])
+        if wire_format == "cbor":
+            return {"id": command_id, "batch": to_object(responses)}
+        return BATCH_TEMPLATE % (json.dumps(command_id), to_json(responses))
+    response = handle_command(message)
+    if command_id is not None:
+        response = with_id(response, command_id)
+    return response
+
+def handle_batch(commands):
+    """Handle each command of a batch, in order."""
+    responses = []
+    for command_dict in commands:
+        try:
+            responses.append(handle_command(command_dict))
+        except Exception as e:
+            responses.append(error_response(f"Command error: {e}"))
+    return responses
 
-def handle_connect():
+def with_id(response, command_id):
+    """Tag a response with the id of the command it answers."""
+    if isinstance(response, str):
+        # Pre-encoded responses are JSON objects: splice the id in up front
+        return '{"id": %s, %s' % (json.dumps(command_id), response[1:])
+    # Constant responses are shared, so tag a copy
+    response = dict(response)
+    response["id"] = command_id
+    return response
+
+def handle_connect(command_dict):
     """Handle connect command."""
     global is_connected
     is_connected = True
     led.on()
-    return {
-        "status": "success",
-        "message": f"Connected to {DEVICE_NAME}",
-        "data": {
-            "device_name": DEVICE_NAME,
-            "firmware_version": FIRMWARE_VERSION
-        }
-    }
+    return reply(CONNECT_RESPONSE)
 
-def handle_disconnect():
+def handle_disconnect(command_dict):
     """Handle disconnect command."""
-    global is_connected
+    global is_connected, pending_wire
     is_connected = False
+    pending_wire = ("json", "line")
     led.off()
-    return {
-        "status": "success",
-        "message": f"Disconnected from {DEVICE_NAME}"
-    }
+    return reply(DISCONNECT_RESPONSE)
 
-def handle_status():
+@micropython.native
+def handle_status(command_dict):
     """Handle status command."""
     global temperature, humidity
     
     # Update uptime
-    uptime = time.ticks_diff(time.ticks_ms(), start_time) // 1000
+    uptime = ticks_diff(ticks_ms(), start_time) // 1000
     
     # Simulate some changing values
-    temperature = 25.0 + (time.ticks_ms() % 10000) / 1000 - 5
-    humidity = 50.0 + (time.ticks_ms() % 20000) / 1000 - 10
+    temperature = 25.0 + (ticks_ms() % 10000) / 1000 - 5
+    humidity = 50.0 + (ticks_ms() % 20000) / 1000 - 10
     
-    return {
-        "status": "success",
-        "message": "Device status retrieved",
-        "data": {
-            "connected": is_connected,
-            "temperature": round(temperature, 2),
-            "humidity": round(humidity, 2),
-            "uptime": uptime,
-            "led_state": led.value()
+    if wire_format == "cbor":
+        return {
+            "status": "success",
+            "message": "Device status retrieved",
+            "data": {
+                "connected": is_connected,
+                "temperature": round(temperature, 2),
+                "humidity": round(humidity, 2),
+                "uptime": uptime,
+                "led_state": led.value()
+            }
         }
-    }
+    return STATUS_TEMPLATE % (
+        "true" if is_connected else "false",
+        temperature,
+        humidity,
+        uptime,
+        led.value()
+    )
 
-def handle_reset():
+def handle_reset(command_dict):
     """Handle reset command."""
     global start_time, temperature, humidity
     
-    start_time = time.ticks_ms()
+    start_time = ticks_ms()
     temperature = 25.0
     humidity = 50.0
     led.off()
     
-    return {
-        "status": "success",
-        "message": f"{DEVICE_NAME} reset successfully"
-    }
+    return reply(RESET_RESPONSE)
 
-def handle_get_version():
+def handle_get_version(command_dict):
     """Handle get version command."""
-    return {
-        "status": "success",
-        "message": "Version information retrieved",
-        "data": {
-            "device_name": DEVICE_NAME,
-            "firmware_version": FIRMWARE_VERSION,
-            "api_version": API_VERSION,
-            "micropython_version": sys.version,
-            "platform": "Raspberry Pi Pico"
-        }
-    }
+    return reply(VERSION_RESPONSE)
 
 def handle_set_parameter(command_dict):
     """Handle set parameter command."""
@@ -208,6 +312,7 @@ def handle_get_parameter(command_dict):
         }
     }
 
+@micropython.native
 def handle_custom_measurement(command_dict):
     """Handle custom measurement command."""
     param1 = command_dict.get("parameter1", 0)
@@ -215,18 +320,16 @@ def handle_custom_measurement(command_dict):
     
     # Simulate some measurement (read ADC, sensor, etc.)
     # Pi Pico has built-in temperature sensor
-    sensor_temp = machine.ADC(4)
-    reading = sensor_temp.read_u16() * 3.3 / (65535)
-    temperature_c = 27 - (reading - 0.706) / 0.001721
+    temperature_c = adc_to_centi_c(temp_sensor.read_u16()) / 100
     
     return {
         "status": "success",
         "message": "Custom measurement completed",
         "data": {
-            "internal_temperature": round(temperature_c, 2),
+            "internal_temperature": temperature_c,
             "parameter1": param1,
             "parameter2": param2,
-            "timestamp": time.ticks_ms()
+            "timestamp": ticks_ms()
         }
     }
 
@@ -246,27 +349,34 @@ def handle_start_measurement(command_dict):
         "message": "Measurement started",
         "data": {
             "duration": duration,
-            "started_at": time.ticks_ms()
+            "started_at": ticks_ms()
         }
     }
 
-def handle_get_results():
+@micropython.native
+def handle_get_results(command_dict):
     """Handle get results command."""
     # Get internal temperature sensor reading
-    sensor_temp = machine.ADC(4)
-    reading = sensor_temp.read_u16() * 3.3 / (65535)
-    internal_temp = 27 - (reading - 0.706) / 0.001721
+    internal_temp = adc_to_centi_c(temp_sensor.read_u16()) / 100
+    uptime = ticks_diff(ticks_ms(), start_time) // 1000
     
-    return {
-        "status": "success",
-        "message": "Measurement results retrieved",
-        "data": {
-            "temperature": round(temperature, 2),
-            "humidity": round(humidity, 2),
-            "internal_temperature": round(internal_temp, 2),
-            "uptime": time.ticks_diff(time.ticks_ms(), start_time) // 1000
+    if wire_format == "cbor":
+        return {
+            "status": "success",
+            "message": "Measurement results retrieved",
+            "data": {
+                "temperature": round(temperature, 2),
+                "humidity": round(humidity, 2),
+                "internal_temperature": round(internal_temp, 2),
+                "uptime": uptime
+            }
         }
-    }
+    return RESULTS_TEMPLATE % (
+        temperature,
+        humidity,
+        internal_temp,
+        uptime
+    )
 
 def handle_blink_led(command_dict):
     """Handle LED blink command (Pi Pico specific)."""
@@ -288,23 +398,169 @@ def handle_blink_led(command_dict):
         }
     }
 
-def handle_unknown_command(command):
-    """Handle unknown command."""
+def handle_set_wire(command_dict):
+    """Handle wire format negotiation."""
+    global pending_wire
+    wire = command_dict.get("format", "json")
+    frames = command_dict.get("framing", "line")
+    
+    if wire not in ("json", "cbor"):
+        return {
+            "status": "error",
+            "message": f"Unsupported wire format: {wire}"
+        }
+    if frames not in ("line", "length"):
+        return {
+            "status": "error",
+            "message": f"Unsupported framing: {frames}"
+        }
+    if wire == "cbor" and cbor2 is None:
+        return {
+            "status": "error",
+            "message": "CBOR not available on this device"
+        }
+    
+    # Reply in the current format; switch once the reply is out
+    pending_wire = (wire, frames)
     return {
-        "status": "error",
-        "message": f"Unknown command: {command}"
+        "status": "success",
+        "message": f"Wire format set to {wire} ({frames} framing)",
+        "data": {
+            "format": wire,
+            "framing": frames
+        }
     }
 
+def error_response(message):
+    """Pre-encoded error response; only the message needs escaping."""
+    return ERROR_TEMPLATE % json.dumps(message)
+
+def handle_unknown_command(command):
+    """Handle unknown command."""
+    return error_response(f"Unknown command: {command}")
+
+# Command name -> handler, built once so dispatch is a single dict lookup
+_DISPATCH = {
+    "CONNECT": handle_connect,
+    "DISCONNECT": handle_disconnect,
+    "STATUS": handle_status,
+    "RESET": handle_reset,
+    "GET_VERSION": handle_get_version,
+    "SET_PARAMETER": handle_set_parameter,
+    "GET_PARAMETER": handle_get_parameter,
+    "CUSTOM_MEASUREMENT": handle_custom_measurement,
+    "START_MEASUREMENT": handle_start_measurement,
+    "GET_RESULTS": handle_get_results,
+    "BLINK_LED": handle_blink_led,
+    "SET_WIRE": handle_set_wire,
+}
+
+def to_json(message):
+    """JSON text for a response, a pre-encoded response, or a list of them."""
+    if isinstance(message, str):
+        return message
+    if isinstance(message, list):
+        return "[" + ",".join([to_json(item) for item in message]) + "]"
+    return json.dumps(message)
+
+def to_object(message):
+    """Decode any pre-encoded responses (for non-JSON wire formats)."""
+    if isinstance(message, str):
+        return json.loads(message)
+    if isinstance(message, list):
+        return [to_object(item) for item in message]
+    return message
+
+def write_message(message):
+    """Encode and write a message in the active wire format and framing.
+    
+    The whole message (including any batch) goes out in a single write to
+    the USB CDC buffer rather than print()'s separate payload and newline.
+    """
+    if wire_format == "cbor":
+        data = cbor2.dumps(to_object(message))
+    else:
+        data = to_json(message).encode()
+    
+    if framing == "length":
+        data = len(data).to_bytes(4, "little") + data
+    elif wire_format == "json":
+        data += b"\n"
+    # CBOR items are self-delimiting, so line framing needs no terminator
+    sys.stdout.buffer.write(data)
+
 def send_response(response):
-    """Send JSON response."""
+    """Send response and apply any pending wire format change."""
+    global wire_format, framing, pending_wire
     try:
-        json_str = json.dumps(response)
-        print(json_str)
+        write_message(response)
     except Exception as e:
-        print(json.dumps({
-            "status": "error", 
-            "message": f"JSON serialization error: {str(e)}"
-        }))
+        write_message(error_response(f"Serialization error: {e}"))
+    
+    if pending_wire is not None:
+        wire_format, framing = pending_wire
+        pending_wire = None
+        # Binary frames may contain 0x03, which must not act as Ctrl-C
+        text_only = wire_format == "json" and framing == "line"
+        micropython.kbd_intr(3 if text_only else -1)
+
+def run_command(message):
+    """Handle a decoded command (or batch) and send its response."""
+    try:
+        send_response(handle_message(message))
+    except Exception as e:
+        send_response(error_response(f"Command error: {e}"))
+
+def read_cbor_command():
+    """Read one CBOR command and send its response."""
+    try:
+        command_dict = cbor2.load(sys.stdin.buffer)
+    except Exception:
+        send_response(INVALID_CBOR_RESPONSE)
+        return
+    run_command(command_dict)
+
+def read_into(view):
+    """Fill a memoryview completely from stdin."""
+    readinto = sys.stdin.buffer.readinto
+    received = 0
+    while received < len(view):
+        received += readinto(view[received:])
+
+def read_framed_command():
+    """Read one length-prefixed command and send its response.
+    
+    Both reads block until the whole header/payload has arrived, so there
+    is no per-byte polling and no need to sleep between messages. Payloads
+    that fit are read straight into the preallocated frame buffer.
+    
+    A header claiming an empty or oversized frame means the stream is out
+    of sync, so rather than blocking on (or allocating) a bogus payload
+    the device reports the error and falls back to JSON line framing.
+    """
+    global pending_wire
+    read_into(frame_view[:4])
+    size = int.from_bytes(frame_view[:4], "little")
+    if size == 0 or size > MAX_FRAME_SIZE:
+        pending_wire = ("json", "line")
+        send_response(error_response(
+            f"Invalid frame size {size}; reverting to json/line framing"
+        ))
+        return
+    if size <= len(frame_buffer):
+        read_into(frame_view[:size])
+        payload = frame_view[:size]
+    else:
+        payload = sys.stdin.buffer.read(size)
+    try:
+        if wire_format == "cbor":
+            command_dict = cbor2.loads(bytes(payload))
+        else:
+            command_dict = json.loads(payload)
+    except Exception:
+        send_response(INVALID_CBOR_RESPONSE if wire_format == "cbor" else INVALID_JSON_RESPONSE)
+        return
+    run_command(command_dict)
 
 def read_command():
     """Read command from serial input."""
@@ -320,45 +576,51 @@ def main():
     print(f"# {DEVICE_NAME} v{FIRMWARE_VERSION} ready")
     print(f"# Commands: CONNECT, STATUS, CUSTOM_MEASUREMENT, BLINK_LED, etc.")
     
-    command_buffer = ""
+    command_buffer = bytearray()
+    
+    # Locals are plain stack loads; globals and attributes are dict lookups
+    stdin = sys.stdin
+    poll = select.select
+    read = stdin.buffer.read
+    sleep_ms = time.sleep_ms
+    json_loads = json.loads
+    rlist = [stdin]
     
     while True:
         try:
+            if framing == "length":
+                read_framed_command()
+                continue
+            
             # Check for incoming data
-            if sys.stdin in select.select([sys.stdin], [], [], 0)[0]:
-                char = sys.stdin.read(1)
-                if char == '\n':
-                    if command_buffer.strip():
+            if poll(rlist, [], [], 0)[0]:
+                if wire_format == "cbor":
+                    read_cbor_command()
+                    continue
+                byte = read(1)
+                if byte == b"\n":
+                    if command_buffer:
                         try:
-                            command_dict = json.loads(command_buffer.strip())
-                            response = handle_command(command_dict)
-                            send_response(response)
-                        except json.JSONDecodeError:
-                            send_response({
-                                "status": "error",
-                                "message": "Invalid JSON format"
-                            })
-                        except Exception as e:
-                            send_response({
-                                "status": "error", 
-                                "message": f"Command error: {str(e)}"
-                            })
-                    command_buffer = ""
-                else:
-                    command_buffer += char
+                            command_dict = json_loads(command_buffer)
+                        except ValueError:
+                            send_response(INVALID_JSON_RESPONSE)
+                        else:
+                            run_command(command_dict)
+                    command_buffer = bytearray()
+                elif byte != b"\r":
+                    command_buffer.extend(byte)
+                # More bytes may already be waiting; only sleep when idle
+                continue
             
             # Small delay to prevent busy waiting
-            time.sleep_ms(10)
+            sleep_ms(10)
             
         except KeyboardInterrupt:
             print("\n# Shutting down...")
             led.off()
             break
         except Exception as e:
-            send_response({
-                "status": "error",
-                "message": f"System error: {str(e)}"
-            })
+            send_response(error_response(f"System error: {e}"))
 
 # For MicroPython, we need select for non-blocking input
 try:
@@ -374,17 +636,20 @@ except ImportError:
         
         while True:
             try:
+                if framing == "length":
+                    read_framed_command()
+                    continue
+                if wire_format == "cbor":
+                    read_cbor_command()
+                    continue
                 line = input()  # This will block until newline
                 if line.strip():
                     try:
                         command_dict = json.loads(line.strip())
-                        response = handle_command(command_dict)
-                        send_response(response)
-                    except json.JSONDecodeError:
-                        send_response({
-                            "status": "error",
-                            "message": "Invalid JSON format"
-                        })
+                    except ValueError:
+                        send_response(INVALID_JSON_RESPONSE)
+                    else:
+                        run_command(command_dict)
             except KeyboardInterrupt:
                 print("\n# Shutting down...")
                 led.off()
@@ -7,10 +7,12 @@ with Arduino, Pi Pico, and other microcontroller-based devices.
 
 __version__ = "0.1.0"
 
-from .module import CustomSerialModule
-from .serial_handler import SerialError
+from .module import CustomSerialModule, CommandBatch
+from .serial_handler import SerialError, SerialTimeoutError
 
 __all__ = [
     "CustomSerialModule",
+    "CommandBatch",
     "SerialError",
+    "SerialTimeoutError",
 ]
\ No newline at end of file
@@ -2,7 +2,10 @@
 
 import asyncio
 import logging
-from typing import Any, Dict, Optional, Callable, List
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from types import MappingProxyType
+from typing import Any, AsyncIterator, Dict, Mapping, Optional, Callable, List, Tuple
 from opentrons.hardware_control.modules.mod_abc import AbstractModule
 from opentrons.hardware_control.modules.types import USBPort, ModuleType
 from opentrons.hardware_control.execution_manager import ExecutionManager
@@ -12,6 +15,27 @@ from .serial_handler import SerialHandler, SerialError
 logger = logging.getLogger(__name__)
 
 
+class CommandBatch:
+    """Commands queued by `CustomSerialModule.batch()`."""
+    
+    def __init__(self) -> None:
+        self._commands: List[Tuple[Dict[str, Any], asyncio.Future]] = []
+        
+    def send_command(self, command: str, **params) -> asyncio.Future:
+        """Queue a command for the batch.
+        
+        Args:
+            command: Command string to send
+            **params: Additional parameters
+            
+        Returns:
+            Future resolved with the response once the batch has been sent
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._commands.append(({"command": command, **params}, future))
+        return future
+
+
 class CustomSerialModule(AbstractModule):
     """Custom serial communication module for OpenTrons Flex."""
     
@@ -49,14 +73,21 @@ class CustomSerialModule(AbstractModule):
         
         # Initialize serial communication
         if not self._is_simulated:
+            # Blocking serial calls run on one dedicated thread, in submission order
+            self._io_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="customserial-io")
             self._serial_handler = SerialHandler(
                 port=port,
                 auto_discover=True,
-                vid_pid_filter=[(0x2341, 0x0043), (0x2E8A, 0x0005)]  # Arduino Uno, Pi Pico
+                vid_pid_filter=[(0x2341, 0x0043), (0x2E8A, 0x0005)],  # Arduino Uno, Pi Pico
+                executor=self._io_executor,
             )
         else:
+            self._io_executor = None
             self._serial_handler = None
             
+        # Bound once so send_command() skips the attribute lookups per call
+        self._send = self._serial_handler.send_json_command_async if self._serial_handler else None
+            
         self._device_info = {
             "model": "Custom Serial Module",
             "version": "1.0.0",
@@ -65,6 +96,10 @@ class CustomSerialModule(AbstractModule):
         self._status = "disconnected"
         self._live_data = {}
         
+        # Read-only views handed out by the properties, so polling them is free
+        self._device_info_view = MappingProxyType(self._device_info)
+        self._live_data_view = MappingProxyType(self._live_data)
+        
     @classmethod
     async def build(
         cls,
@@ -114,15 +149,23 @@ class CustomSerialModule(AbstractModule):
                     else:
                         self._status = "error"
                 except Exception as e:
-                    logger.warning(f"Could not get device status: {e}")
+                    logger.warning("Could not get device status: %s", e)
                     self._status = "connected"  # Still connected, just no status
                     
-            await asyncio.get_event_loop().run_in_executor(None, connect)
+                # Prefer a length-framed CBOR link, then length-framed JSON
+                for wire_format in ("cbor", "json"):
+                    try:
+                        self._serial_handler.set_wire_format(wire_format, framing="length")
+                        break
+                    except SerialError as e:
+                        logger.info("Wire format '%s' not available: %s", wire_format, e)
+                    
+            await asyncio.get_running_loop().run_in_executor(self._io_executor, connect)
     
     @property
-    def device_info(self) -> Dict[str, Any]:
-        """Static device information."""
-        return self._device_info.copy()
+    def device_info(self) -> Mapping[str, Any]:
+        """Static device information (read-only view)."""
+        return self._device_info_view
     
     @property
     def is_simulated(self) -> bool:
@@ -130,9 +173,9 @@ class CustomSerialModule(AbstractModule):
         return self._is_simulated
     
     @property
-    def live_data(self) -> Dict[str, Any]:
-        """Dynamic module data."""
-        return self._live_data.copy()
+    def live_data(self) -> Mapping[str, Any]:
+        """Dynamic module data (read-only view)."""
+        return self._live_data_view
     
     @property
     def status(self) -> str:
@@ -153,11 +196,9 @@ class CustomSerialModule(AbstractModule):
         """Deactivate the module."""
         if not self._is_simulated and self._serial_handler:
             try:
-                await asyncio.get_event_loop().run_in_executor(
-                    None, self._serial_handler.send_json_command, {"command": "DISCONNECT"}
-                )
+                await self._serial_handler.send_json_command_async({"command": "DISCONNECT"})
             except Exception as e:
-                logger.warning(f"Error during deactivation: {e}")
+                logger.warning("Error during deactivation: %s", e)
             finally:
                 self._status = "disconnected"
     
@@ -180,11 +221,13 @@ class CustomSerialModule(AbstractModule):
         await self.deactivate()
         if not self._is_simulated and self._serial_handler:
             try:
-                await asyncio.get_event_loop().run_in_executor(
-                    None, self._serial_handler.disconnect
+                await asyncio.get_running_loop().run_in_executor(
+                    self._io_executor, self._serial_handler.disconnect
                 )
             except Exception as e:
                 logger.error(f"Error during cleanup: {e}")
+        if self._io_executor is not None:
+            self._io_executor.shutdown(wait=True)
     
     # Custom methods for user interaction
     
@@ -205,16 +248,62 @@ class CustomSerialModule(AbstractModule):
                 "data": params
             }
         
-        if not self._serial_handler:
+        send = self._send
+        if send is None:
             raise SerialError("Module not properly initialized")
         
         cmd_dict = {"command": command}
         if params:
             cmd_dict.update(params)
         
-        return await asyncio.get_event_loop().run_in_executor(
-            None, self._serial_handler.send_json_command, cmd_dict
-        )
+        return await send(cmd_dict)
+    
+    @asynccontextmanager
+    async def batch(self) -> AsyncIterator[CommandBatch]:
+        """Queue commands and send them to the device in a single round-trip.
+        
+        Commands are sent in order when the block exits and each returned
+        future is resolved with its response::
+        
+            async with module.batch() as batch:
+                started = batch.send_command("START_MEASUREMENT", duration=30)
+                batch.send_command("BLINK_LED", count=3)
+            print(started.result())
+        
+        The device must accept a list of commands and reply with a list of
+        responses.
+        """
+        batch = CommandBatch()
+        try:
+            yield batch
+            if batch._commands:
+                responses = await self._send_batch(
+                    [cmd_dict for cmd_dict, _ in batch._commands]
+                )
+                for (_, future), response in zip(batch._commands, responses):
+                    future.set_result(response)
+        finally:
+            # Anything not answered (error inside the block or while sending)
+            for _, future in batch._commands:
+                if not future.done():
+                    future.cancel()
+    
+    async def _send_batch(self, commands: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Send queued batch commands to the connected device."""
+        if self._is_simulated:
+            return [
+                {
+                    "status": "success",
+                    "message": f"Simulated command: {cmd_dict['command']}",
+                    "data": {k: v for k, v in cmd_dict.items() if k != "command"},
+                }
+                for cmd_dict in commands
+            ]
+        
+        if not self._serial_handler:
+            raise SerialError("Module not properly initialized")
+        
+        return await self._serial_handler.send_batch_async(commands)
     
     async def get_device_status(self) -> Dict[str, Any]:
         """Get current device status."""
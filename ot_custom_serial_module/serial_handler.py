@@ -1,20 +1,96 @@
 """Serial communication handler for custom hardware modules."""
 
+import asyncio
+import io
+import itertools
 import json
+import os
+import select
 import time
+import weakref
 import logging
-from typing import Any, Dict, Optional, Union, List
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Union, List
 import serial
-import serial.tools.list_ports
-from threading import Lock, Event
-from contextlib import contextmanager
+from concurrent.futures import Executor
+from threading import Lock
+from contextlib import asynccontextmanager, contextmanager
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+try:
+    import cbor2
+except ImportError:
+    cbor2 = None
 
 class SerialError(Exception):
     """Base exception for serial module errors."""
     pass
 
+class SerialTimeoutError(SerialError):
+    """The device did not accept or answer a message in time."""
+    pass
+
 logger = logging.getLogger(__name__)
 
+# JSON codec used on the command path. All shims work on bytes so payloads go
+# straight to/from pyserial without an extra str round-trip.
+if orjson is not None:
+    _dumps = orjson.dumps
+    _loads = orjson.loads
+elif msgspec is not None:
+    _dumps = msgspec.json.Encoder().encode
+    _loads = msgspec.json.decode
+elif ujson is not None:
+    def _dumps(obj: Any) -> bytes:
+        # ujson is compact by default; it returns str, so encode once here
+        return ujson.dumps(obj, ensure_ascii=False).encode('utf-8')
+    _loads = ujson.loads
+else:
+    # Built once: json.dumps()/json.loads() construct a new encoder/decoder
+    # on every call that passes options. Compact and UTF-8 like orjson.
+    _json_encode = json.JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+    _json_decode = json.JSONDecoder().decode
+    
+    def _dumps(obj: Any) -> bytes:
+        return _json_encode(obj).encode('utf-8')
+    
+    def _loads(data: Union[bytes, bytearray, str]) -> Any:
+        if not isinstance(data, str):
+            data = data.decode('utf-8')
+        return _json_decode(data)
+
+# Every decoder above raises a ValueError (or a subclass) on malformed input
+_JSON_DECODE_ERRORS = (ValueError,)
+
+
+def _close_serial(port: serial.Serial) -> None:
+    """Close a port left open by a handler that was garbage collected."""
+    try:
+        if port.is_open:
+            port.close()
+    except Exception:
+        pass
+
+
+# Returned by SerialHandler._take_message() while a message is still arriving
+_INCOMPLETE = object()
+
+# On POSIX the message path talks to pyserial's file descriptor directly
+_POSIX = os.name == "posix"
+
 
 class SerialHandler:
     """Handles serial communication with custom hardware modules."""
@@ -22,6 +98,14 @@ class SerialHandler:
     DEFAULT_BAUDRATE = 115200
     DEFAULT_TIMEOUT = 5.0
     DEFAULT_WRITE_TIMEOUT = 2.0
+    WIRE_FORMATS = ("json", "cbor")
+    FRAMINGS = ("line", "length")
+    MAX_FRAME_SIZE = 65536
+    DEVICE_CACHE_TTL = 3.0
+    
+    # Port enumeration is shared by all handlers; it can be slow and rarely changes
+    _device_cache: Optional[List[Dict[str, Any]]] = None
+    _device_cache_time = 0.0
     
     def __init__(
         self,
@@ -31,6 +115,11 @@ class SerialHandler:
         write_timeout: float = DEFAULT_WRITE_TIMEOUT,
         auto_discover: bool = True,
         vid_pid_filter: Optional[List[tuple]] = None,
+        low_latency: bool = True,
+        retry_count: int = 0,
+        retry_backoff: float = 0.01,
+        framing: str = "line",
+        executor: Optional[Executor] = None,
     ) -> None:
         """Initialize serial handler.
         
@@ -41,22 +130,62 @@ class SerialHandler:
             write_timeout: Write timeout in seconds.
             auto_discover: Whether to auto-discover devices if port is None.
             vid_pid_filter: List of (vendor_id, product_id) tuples for device filtering.
+            low_latency: Whether to disable USB-serial latency buffering on connect.
+            retry_count: How many times a command is re-sent after a timeout.
+                Off by default, since a timed-out command may already have
+                run; only enable it for devices whose commands are safe to repeat.
+            retry_backoff: Delay before the first retry in seconds, doubled for each further retry.
+            framing: Framing the device uses when the port is opened, one of FRAMINGS.
+                Use "length" for firmware that always speaks length-prefixed frames.
+            executor: Executor for the blocking calls behind the async methods
+                where the event loop cannot watch the port directly; None
+                means the loop's default executor.
         """
+        if framing not in self.FRAMINGS:
+            raise ValueError(f"Unsupported framing: {framing}")
+            
         self.port = port
         self.baudrate = baudrate
         self.timeout = timeout
         self.write_timeout = write_timeout
         self.auto_discover = auto_discover
         self.vid_pid_filter = vid_pid_filter or []
+        self._vid_pid_set = frozenset(tuple(vid_pid) for vid_pid in self.vid_pid_filter)
+        self.low_latency = low_latency
+        self.retry_count = retry_count
+        self.retry_backoff = retry_backoff
+        self.default_framing = framing
+        self.wire_format = "json"
+        self.framing = framing
+        self.executor = executor
         
         self._serial: Optional[serial.Serial] = None
+        # _lock guards writes and the port itself, _rx_lock the receive side,
+        # so a blocked read never stalls a writer. Take _rx_lock first.
         self._lock = Lock()
-        self._connected = Event()
+        self._rx_lock = Lock()
+        self._is_connected = False
+        self._async_lock: Optional[asyncio.Lock] = None
+        self._rx_buf = bytearray()
+        
+        # Bound on connect so the I/O paths skip the per-call attribute lookups
+        self._fd: Optional[int] = None
+        self._read: Optional[Callable[[int], bytes]] = None
+        self._write: Optional[Callable[[bytes], Optional[int]]] = None
+        self._finalizer: Optional[weakref.finalize] = None
+        
+        # Background receive state, see start_listening()
+        self._listening = False
+        self._on_event: Optional[Callable[[Any], None]] = None
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._next_id = itertools.count(1)
+        self._ids_echoed = False
+        self._rx_task: Optional[asyncio.Task] = None
         
     @property
     def is_connected(self) -> bool:
         """Check if the serial connection is active."""
-        return self._connected.is_set() and self._serial is not None and self._serial.is_open
+        return self._is_connected and self._serial is not None and self._serial.is_open
     
     def discover_devices(self) -> List[Dict[str, Any]]:
         """Discover available serial devices.
@@ -65,29 +194,47 @@ class SerialHandler:
             List of device information dictionaries.
         """
         devices = []
-        ports = serial.tools.list_ports.comports()
-        
-        for port in ports:
-            device_info = {
-                'device': port.device,
-                'description': port.description,
-                'hwid': port.hwid,
-                'vid': port.vid,
-                'pid': port.pid,
-                'serial_number': port.serial_number,
-                'manufacturer': port.manufacturer,
-                'product': port.product,
-            }
-            
+        
+        for device_info in self._list_ports():
             # Apply VID/PID filter if specified
             if self.vid_pid_filter:
-                if any((port.vid, port.pid) == (vid, pid) for vid, pid in self.vid_pid_filter):
-                    devices.append(device_info)
+                if (device_info['vid'], device_info['pid']) in self._vid_pid_set:
+                    devices.append(dict(device_info))
             else:
-                devices.append(device_info)
+                devices.append(dict(device_info))
                 
         return devices
     
+    @classmethod
+    def _list_ports(cls) -> List[Dict[str, Any]]:
+        """Enumerate serial ports, reusing the result for DEVICE_CACHE_TTL seconds."""
+        now = time.monotonic()
+        if cls._device_cache is None or now - cls._device_cache_time >= cls.DEVICE_CACHE_TTL:
+            # Imported on first use: on some platforms it pulls in slow
+            # platform bindings that handlers with an explicit port never need
+            from serial.tools import list_ports
+            
+            cls._device_cache = [
+                {
+                    'device': port.device,
+                    'description': port.description,
+                    'hwid': port.hwid,
+                    'vid': port.vid,
+                    'pid': port.pid,
+                    'serial_number': port.serial_number,
+                    'manufacturer': port.manufacturer,
+                    'product': port.product,
+                }
+                for port in list_ports.comports()
+            ]
+            cls._device_cache_time = now
+        return cls._device_cache
+    
+    @classmethod
+    def invalidate_device_cache(cls) -> None:
+        """Forget cached port enumeration so the next discovery rescans."""
+        cls._device_cache = None
+    
     def auto_discover_port(self) -> Optional[str]:
         """Auto-discover the best matching serial port.
         
@@ -103,7 +250,7 @@ class SerialHandler:
         # If we have VID/PID filters, prefer those matches
         if self.vid_pid_filter:
             for device in devices:
-                if any((device['vid'], device['pid']) == (vid, pid) for vid, pid in self.vid_pid_filter):
+                if (device['vid'], device['pid']) in self._vid_pid_set:
                     logger.info(f"Auto-discovered device: {device['device']} ({device['description']})")
                     return device['device']
         
@@ -124,6 +271,7 @@ class SerialHandler:
                 self.port = self.auto_discover_port()
                 
             if not self.port:
+                self.invalidate_device_cache()
                 raise SerialError("No serial port specified and auto-discovery failed")
                 
             try:
@@ -137,6 +285,12 @@ class SerialHandler:
                     stopbits=serial.STOPBITS_ONE,
                 )
                 
+                # Close the port if the handler is dropped without disconnect()
+                self._finalizer = weakref.finalize(self, _close_serial, self._serial)
+                
+                if self.low_latency:
+                    self._enable_low_latency()
+                
                 # Wait a moment for the connection to stabilize
                 time.sleep(0.1)
                 
@@ -144,15 +298,50 @@ class SerialHandler:
                 self._serial.reset_input_buffer()
                 self._serial.reset_output_buffer()
                 
-                self._connected.set()
+                self._read = self._serial.read
+                self._write = self._serial.write
+                if _POSIX:
+                    self._fd = self._serial.fileno()
+                
+                self._is_connected = True
                 logger.info(f"Connected to serial device on {self.port}")
                 
             except serial.SerialException as e:
+                # The port list may be stale (device unplugged or renumbered)
+                self.invalidate_device_cache()
                 raise SerialError(f"Failed to connect to {self.port}: {e}")
     
+    def _enable_low_latency(self) -> None:
+        """Turn off the kernel's USB-serial latency timer (Linux only).
+        
+        Without this, small replies can sit in the adapter for up to 16 ms
+        before being delivered, which dominates the command round-trip.
+        """
+        # Same as `setserial <port> low_latency`; only Linux pyserial has it
+        set_low_latency_mode = getattr(self._serial, "set_low_latency_mode", None)
+        if set_low_latency_mode is not None:
+            try:
+                set_low_latency_mode(True)
+            except (OSError, ValueError) as e:
+                logger.debug(f"Could not set low latency mode on {self.port}: {e}")
+        
+        # FTDI adapters have their own latency timer in sysfs
+        latency_timer = f"/sys/bus/usb-serial/devices/{os.path.basename(self.port)}/latency_timer"
+        if os.path.exists(latency_timer):
+            try:
+                with open(latency_timer, "w") as f:
+                    f.write("1")
+            except OSError as e:
+                logger.debug(f"Could not set {latency_timer}: {e}")
+    
     def disconnect(self) -> None:
-        """Close serial connection."""
-        with self._lock:
+        """Close serial connection.
+        
+        Call stop_listening() first if the handler is receiving in the
+        background; the event loop must not keep watching a closed port.
+        """
+        self._require_not_listening()
+        with self._rx_lock, self._lock:
             if self._serial and self._serial.is_open:
                 try:
                     self._serial.close()
@@ -160,8 +349,17 @@ class SerialHandler:
                 except Exception as e:
                     logger.warning(f"Error during disconnect: {e}")
                 finally:
-                    self._connected.clear()
+                    if self._finalizer is not None:
+                        self._finalizer.detach()
+                        self._finalizer = None
+                    self._is_connected = False
                     self._serial = None
+                    self._fd = None
+                    self._read = None
+                    self._write = None
+                    self._rx_buf.clear()
+                    self.wire_format = "json"
+                    self.framing = self.default_framing
     
     @contextmanager
     def connection(self):
@@ -172,28 +370,67 @@ class SerialHandler:
         finally:
             self.disconnect()
     
-    def write_raw(self, data: bytes) -> None:
+    def write_raw(self, data: bytes, fsync: bool = False) -> None:
         """Write raw bytes to serial port.
         
+        Returns once the bytes are queued in the driver. Waiting for them to
+        go out on the wire (tcdrain) is unnecessary for request/response
+        traffic, since the reply read already synchronizes with the device,
+        and would block for the whole transmission time.
+        
         Args:
             data: Raw bytes to send.
+            fsync: Whether to also wait until the data has been transmitted.
         """
         if not self.is_connected:
             raise SerialError("Not connected to serial device")
             
-        try:
-            with self._lock:
-                bytes_written = self._serial.write(data)
-                if bytes_written != len(data):
-                    raise SerialError(f"Failed to write all data. Expected {len(data)}, wrote {bytes_written}")
-                self._serial.flush()
-                
-        except (serial.SerialTimeoutException, serial.SerialException) as e:
-            raise SerialError(f"Serial write error: {e}")
+        with self._lock:
+            port = self._serial
+            if port is None:
+                # disconnect() ran since the check above
+                raise SerialError("Not connected to serial device")
+            self._write_all(data)
+            
+        if fsync:
+            # Draining can take the whole transmission time; don't hold the lock.
+            # A concurrent disconnect() closes the port under us, which pyserial
+            # reports as an OSError or ValueError rather than SerialException.
+            try:
+                port.flush()
+            except (serial.SerialException, OSError, ValueError) as e:
+                raise SerialError(f"Serial write error: {e}")
     
     def read_raw(self, size: int = 1) -> bytes:
         """Read raw bytes from serial port.
         
+        Args:
+            size: Number of bytes to read.
+            
+        Returns:
+            Raw bytes read from the port. Fewer than `size` bytes are
+            returned if the read times out after some data arrived.
+        """
+        if not self.is_connected:
+            raise SerialError("Not connected to serial device")
+        self._require_not_listening()
+            
+        deadline = time.monotonic() + self.timeout
+        with self._rx_lock:
+            buf = self._rx_buf
+            try:
+                while len(buf) < size:
+                    self._fill_rx_buf(deadline)
+            except SerialError:
+                if not buf:
+                    raise
+            data = bytes(buf[:size])
+            del buf[:size]
+            return data
+    
+    def read_exactly(self, size: int) -> bytes:
+        """Read exactly `size` bytes from serial port.
+        
         Args:
             size: Number of bytes to read.
             
@@ -202,17 +439,92 @@ class SerialHandler:
         """
         if not self.is_connected:
             raise SerialError("Not connected to serial device")
+        self._require_not_listening()
+            
+        with self._rx_lock:
+            return self._read_buffered(lambda: self._take_bytes(size))
+    
+    def drain_input(self) -> int:
+        """Move everything the driver has already received into the receive buffer.
+        
+        Never blocks. The pending bytes are fetched with a single read and
+        framed from memory by the read methods.
+        
+        Returns:
+            Number of bytes added to the buffer.
+        """
+        if not self.is_connected:
+            raise SerialError("Not connected to serial device")
+        self._require_not_listening()
             
         try:
-            with self._lock:
-                data = self._serial.read(size)
-                if not data:
-                    raise SerialError("Read timeout")
-                return data
+            with self._rx_lock:
+                pending = self._serial.in_waiting
+                if pending:
+                    self._rx_buf += self._read(pending)
+                return pending
                 
         except serial.SerialException as e:
             raise SerialError(f"Serial read error: {e}")
     
+    def write_frame(self, payload: bytes) -> None:
+        """Write one message using the active framing.
+        
+        The frame is written in one piece; on POSIX it is handed straight
+        to os.write() on the port's file descriptor.
+        
+        Args:
+            payload: Encoded message.
+        """
+        if not self.is_connected:
+            raise SerialError("Not connected to serial device")
+        with self._lock:
+            self._write_all(self._frame(payload))
+    
+    def read_frame(self) -> bytes:
+        """Read one message using the active framing.
+        
+        The port is read in bulk into the receive buffer and the frame is
+        cut out of it in memory.
+        
+        Returns:
+            Encoded message, without header or terminator.
+        """
+        if not self.is_connected:
+            raise SerialError("Not connected to serial device")
+        self._require_not_listening()
+        with self._rx_lock:
+            return self._read_buffered(self._take_frame)
+    
+    def send_framed(self, payload: bytes) -> None:
+        """Write one length-prefixed frame: a 4-byte little-endian size, then the payload.
+        
+        Unlike write_frame(), this ignores the active framing, so it is only
+        meaningful for devices that expect length-prefixed frames.
+        
+        Args:
+            payload: Encoded message.
+        """
+        if not self.is_connected:
+            raise SerialError("Not connected to serial device")
+        with self._lock:
+            self._write_all(len(payload).to_bytes(4, 'little') + payload)
+    
+    def recv_framed(self) -> bytes:
+        """Read one length-prefixed frame, regardless of the active framing.
+        
+        The payload is cut out of the receive buffer by its declared size,
+        with no scanning for a terminator.
+        
+        Returns:
+            Frame payload, without the size header.
+        """
+        if not self.is_connected:
+            raise SerialError("Not connected to serial device")
+        self._require_not_listening()
+        with self._rx_lock:
+            return self._read_buffered(self._take_length_prefixed)
+    
     def write_line(self, message: str, encoding: str = 'utf-8') -> None:
         """Write a line of text to serial port.
         
@@ -220,8 +532,29 @@ class SerialHandler:
             message: Text message to send.
             encoding: Text encoding to use.
         """
-        line = f"{message}\n"
-        self.write_raw(line.encode(encoding))
+        self._require_text_mode()
+        if encoding == 'utf-8':
+            # Skip building an intermediate str just to append the newline
+            self.write_raw(message.encode('utf-8') + b'\n')
+        else:
+            self.write_raw(f"{message}\n".encode(encoding))
+    
+    def read_line_bytes(self) -> bytes:
+        """Read a raw line from serial port.
+        
+        There is no per-byte read loop: on POSIX the port is waited on with
+        select() and drained with one os.read() per arriving chunk, and the
+        line is cut out of the receive buffer in memory.
+        
+        Returns:
+            Line read from the port as bytes, with newline stripped.
+        """
+        if not self.is_connected:
+            raise SerialError("Not connected to serial device")
+        self._require_not_listening()
+        self._require_text_mode()
+        with self._rx_lock:
+            return self._read_buffered(self._take_line)
     
     def read_line(self, encoding: str = 'utf-8') -> str:
         """Read a line of text from serial port.
@@ -232,22 +565,28 @@ class SerialHandler:
         Returns:
             Line read from the port, with newline stripped.
         """
-        if not self.is_connected:
-            raise SerialCommunicationError("Not connected to serial device")
-            
         try:
-            with self._lock:
-                line = self._serial.readline()
-                if not line:
-                    raise SerialError("Read timeout")
-                return line.decode(encoding).rstrip('\r\n')
-                
-        except (UnicodeDecodeError, serial.SerialException) as e:
+            return self.read_line_bytes().decode(encoding)
+        except UnicodeDecodeError as e:
             raise SerialError(f"Serial read error: {e}")
     
+    def _require_text_mode(self) -> None:
+        """Refuse newline-terminated text once a binary format or framing is active."""
+        if self.wire_format != "json" or self.framing != "line":
+            raise SerialError(
+                f"Text lines need json/line framing, not {self.wire_format}/{self.framing}"
+            )
+    
+    def _require_not_listening(self) -> None:
+        """Refuse direct reads while start_listening() owns the receive side."""
+        if self._listening:
+            raise SerialError("Not available while listening; call stop_listening() first")
+    
     def send_command(self, command: str, **kwargs) -> str:
         """Send a command and wait for response.
         
+        The command is re-sent on timeout if retry_count is set, see _retry().
+        
         Args:
             command: Command string to send.
             **kwargs: Additional parameters to include in command.
@@ -255,34 +594,796 @@ class SerialHandler:
         Returns:
             Response string from the device.
         """
+        return self._retry(self._send_command_once, command, kwargs)
+    
+    def _send_command_once(self, command: str, kwargs: Dict[str, Any]) -> str:
+        """Write a text command and read the reply line."""
+        self._require_text_mode()
         if kwargs:
             # Build command with parameters
             cmd_dict = {'command': command, **kwargs}
-            cmd_json = json.dumps(cmd_dict)
-            self.write_line(cmd_json)
+            self.write_raw(_dumps(cmd_dict) + b'\n')
         else:
             self.write_line(command)
             
         return self.read_line()
     
     def send_json_command(self, command_dict: Dict[str, Any]) -> Dict[str, Any]:
-        """Send a JSON command and parse JSON response.
+        """Send a command and parse the response in the active wire format.
+        
+        The command is re-sent on timeout if retry_count is set, see _retry().
         
         Args:
-            command_dict: Command dictionary to send as JSON.
+            command_dict: Command dictionary to send.
             
         Returns:
             Parsed response dictionary.
         """
-        cmd_json = json.dumps(command_dict)
-        self.write_line(cmd_json)
+        response = self._retry(self._exchange, command_dict)
+        if not isinstance(response, dict):
+            raise SerialError(f"Unexpected response: {response!r}")
+        self._follow_disconnect((command_dict,), (response,))
+        return response
+    
+    def _follow_disconnect(self, commands: Any, responses: Any) -> None:
+        """Drop back to the power-on wire format once the device acknowledges DISCONNECT.
+        
+        The firmware returns to JSON (and its default framing) after
+        answering DISCONNECT while the port stays open, so the handler has
+        to follow or every later command would time out.
+        """
+        for command, response in zip(commands, responses):
+            if (
+                isinstance(command, dict)
+                and str(command.get("command", "")).upper() == "DISCONNECT"
+                and isinstance(response, dict)
+                and response.get("status") == "success"
+            ):
+                self.wire_format = "json"
+                self.framing = self.default_framing
+                return
+    
+    def _retry(self, call: Callable[..., Any], *args: Any) -> Any:
+        """Run an exchange, re-running it up to retry_count times on timeout.
+        
+        Transient USB-CDC hiccups are far cheaper to retry than tearing the
+        connection down and rediscovering the device. The timed-out command
+        may still have been executed, so this is only enabled (retry_count
+        above 0) for devices whose commands are idempotent.
+        
+        Before each retry the handler sleeps for the backoff and discards
+        whatever input has arrived by then. A reply later than that can
+        still be read as the answer to the retry; the backoff only shrinks
+        that window, it does not close it.
+        """
+        attempt = 0
+        while True:
+            try:
+                return call(*args)
+            except SerialTimeoutError as e:
+                if attempt >= self.retry_count:
+                    raise
+                logger.warning(f"{e} on {self.port}, retrying ({attempt + 1}/{self.retry_count})")
+                time.sleep(self.retry_backoff * 2 ** attempt)
+                self._reset_input()
+                attempt += 1
+    
+    def _reset_input(self) -> None:
+        """Discard buffered and pending input, e.g. a late reply."""
+        with self._rx_lock:
+            self._rx_buf.clear()
+            if self._serial is None:
+                return
+            try:
+                self._serial.reset_input_buffer()
+            except serial.SerialException as e:
+                raise SerialError(f"Serial read error: {e}")
+    
+    def send_batch(self, commands: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Send several commands as one message and parse the batched response.
+        
+        The commands go out as a single array and the device replies with an
+        array of responses in the same order, so the whole batch costs one
+        round-trip.
+        
+        Args:
+            commands: Command dictionaries to send.
+            
+        Returns:
+            Parsed response dictionaries, one per command.
+        """
+        responses = self._exchange(list(commands))
+        if not isinstance(responses, list) or len(responses) != len(commands):
+            raise SerialError(f"Device did not return a batch response: {responses!r}")
+        self._follow_disconnect(commands, responses)
+        return responses
+    
+    def send_commands_batch(self, commands: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Pipeline several commands: one write, then read one reply per command.
         
-        response_line = self.read_line()
+        Unlike send_batch(), each command is sent as its own message, so
+        this works with any device that processes commands in the order
+        they arrive and answers each one. Only the write is batched; the
+        device still handles the commands one at a time.
+        
+        Args:
+            commands: Command dictionaries to send.
+            
+        Returns:
+            Parsed response dictionaries, one per command, in order.
+        """
+        commands = list(commands)
+        if not commands:
+            return []
+        responses = self._exchange_many(commands)
+        for response in responses:
+            if not isinstance(response, dict):
+                raise SerialError(f"Unexpected response: {response!r}")
+        self._follow_disconnect(commands, responses)
+        return responses
+    
+    def _exchange(self, message: Any) -> Any:
+        """Send a message and decode the reply in the active wire format."""
+        return self._exchange_many([message])[0]
+    
+    def _exchange_many(self, messages: List[Any]) -> List[Any]:
+        """Write all `messages` at once, then decode one reply for each."""
+        payload = b"".join([self._encode_frame(message) for message in messages])
+        return self._exchange_frames(payload, len(messages))
+    
+    def _exchange_frames(self, payload: bytes, count: int) -> List[Any]:
+        """Write already-framed bytes, then decode `count` replies."""
+        if not self.is_connected:
+            raise SerialError("Not connected to serial device")
+        self._require_not_listening()
+        # Holding the receive side across the write keeps the replies paired
+        # with this exchange; the write lock is released as soon as the bytes
+        # are queued.
+        with self._rx_lock:
+            with self._lock:
+                self._write_all(payload)
+            try:
+                # Each reply gets the full timeout
+                return [self._read_buffered(self._take_message) for _ in range(count)]
+            except SerialError:
+                # Drop any partial reply so the next exchange starts clean
+                self._rx_buf.clear()
+                raise
+    
+    def _encode_frame(self, message: Any) -> bytes:
+        """Encode a message in the active wire format and framing."""
+        if self.wire_format == "cbor":
+            payload = cbor2.dumps(message)
+        else:
+            payload = _dumps(message)
+        return self._frame(payload)
+    
+    def _frame(self, payload: bytes) -> bytes:
+        """Wrap an encoded message in the active framing."""
+        if self.framing == "length":
+            return len(payload).to_bytes(4, 'little') + payload
+        if self.wire_format == "json":
+            return payload + b'\n'
+        return payload  # line-framed CBOR is self-delimiting
+    
+    def _decode_payload(self, payload: bytes) -> Any:
+        """Decode a single message payload in the active wire format."""
+        if self.wire_format == "cbor":
+            try:
+                return cbor2.loads(payload)
+            except cbor2.CBORDecodeError as e:
+                raise SerialError(f"Failed to parse CBOR response: {e}")
         try:
-            return json.loads(response_line)
-        except json.JSONDecodeError as e:
+            return _loads(payload)
+        except _JSON_DECODE_ERRORS as e:
             raise SerialError(f"Failed to parse JSON response: {e}")
     
+    def _take_frame(self) -> Any:
+        """Pop one length-prefixed or newline-terminated frame off the receive buffer.
+        
+        Returns:
+            The frame payload as bytes, or _INCOMPLETE if more bytes are needed.
+        """
+        if self.framing == "length":
+            return self._take_length_prefixed()
+        return self._take_line()
+    
+    def _take_length_prefixed(self) -> Any:
+        """Pop one length-prefixed frame off the receive buffer.
+        
+        Returns:
+            The frame payload as bytes, or _INCOMPLETE if more bytes are needed.
+        """
+        buf = self._rx_buf
+        if len(buf) < 4:
+            return _INCOMPLETE
+        size = int.from_bytes(buf[:4], 'little')
+        if size > self.MAX_FRAME_SIZE:
+            raise SerialError(f"Frame too large: {size} bytes")
+        if len(buf) < 4 + size:
+            return _INCOMPLETE
+        payload = bytes(buf[4:4 + size])
+        del buf[:4 + size]
+        return payload
+    
+    def _take_bytes(self, size: int) -> Any:
+        """Pop exactly `size` bytes off the receive buffer, or return _INCOMPLETE."""
+        buf = self._rx_buf
+        if len(buf) < size:
+            return _INCOMPLETE
+        data = bytes(buf[:size])
+        del buf[:size]
+        return data
+    
+    def _take_line(self) -> Any:
+        """Pop one newline-terminated line off the receive buffer.
+        
+        Returns:
+            The line as bytes without its terminator, or _INCOMPLETE.
+        """
+        buf = self._rx_buf
+        end = buf.find(b'\n')
+        if end < 0:
+            return _INCOMPLETE
+        line = bytes(buf[:end]).rstrip(b'\r')
+        del buf[:end + 1]
+        return line
+    
+    def _take_message(self) -> Any:
+        """Pop one complete message off the receive buffer.
+        
+        Returns:
+            The decoded message, or _INCOMPLETE if more bytes are needed.
+        """
+        if self.framing == "length" or self.wire_format == "json":
+            payload = self._take_frame()
+            if payload is _INCOMPLETE:
+                return payload
+            return self._decode_payload(payload)
+            
+        buf = self._rx_buf
+        fp = io.BytesIO(buf)
+        try:
+            message = cbor2.load(fp)
+        except cbor2.CBORDecodeEOF:
+            return _INCOMPLETE
+        except cbor2.CBORDecodeError as e:
+            raise SerialError(f"Failed to parse CBOR response: {e}")
+        del buf[:fp.tell()]
+        return message
+    
+    def _read_buffered(self, take: Callable[[], Any]) -> Any:
+        """Fill the receive buffer until `take` can pop a complete item off it.
+        
+        The caller must hold the receive lock.
+        """
+        deadline = time.monotonic() + self.timeout
+        item = take()
+        while item is _INCOMPLETE:
+            self._fill_rx_buf(deadline)
+            item = take()
+        return item
+    
+    def _write_all(self, data: bytes) -> None:
+        """Write all of `data` to the port. The caller must hold the lock."""
+        if _POSIX:
+            self._write_fd(data)
+            return
+            
+        try:
+            bytes_written = self._write(data)
+        except serial.SerialTimeoutException as e:
+            raise SerialTimeoutError(f"Write timeout: {e}")
+        except serial.SerialException as e:
+            raise SerialError(f"Serial write error: {e}")
+        if bytes_written != len(data):
+            raise SerialError(f"Failed to write all data. Expected {len(data)}, wrote {bytes_written}")
+    
+    def _write_fd(self, data: bytes) -> None:
+        """Write all of `data` straight to the port's file descriptor."""
+        fd = self._fd
+        deadline = time.monotonic() + self.write_timeout
+        view = memoryview(data)
+        while view:
+            try:
+                view = view[os.write(fd, view):]
+            except BlockingIOError:
+                pass
+            except OSError as e:
+                raise SerialError(f"Serial write error: {e}")
+            if view:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not select.select([], [fd], [], remaining)[1]:
+                    raise SerialTimeoutError("Write timeout")
+    
+    def _fill_rx_buf(self, deadline: float) -> None:
+        """Wait for the port to become readable, then buffer what has arrived."""
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise SerialTimeoutError("Read timeout")
+            
+        if not _POSIX:
+            # Block for the first byte (bounded by pyserial's timeout), then
+            # take whatever else is already waiting in the same call
+            try:
+                chunk = self._read(max(1, self._serial.in_waiting))
+            except serial.SerialException as e:
+                raise SerialError(f"Serial read error: {e}")
+            if not chunk:
+                raise SerialTimeoutError("Read timeout")
+            self._rx_buf += chunk
+            return
+            
+        fd = self._fd
+        if not select.select([fd], [], [], remaining)[0]:
+            raise SerialTimeoutError("Read timeout")
+        self._read_available(fd)
+    
+    def _read_available(self, fd: int) -> None:
+        """Append everything currently readable on `fd` to the receive buffer.
+        
+        The port is drained with one large os.read() rather than byte by byte.
+        """
+        try:
+            chunk = os.read(fd, self.MAX_FRAME_SIZE)
+        except BlockingIOError:
+            return
+        except OSError as e:
+            raise SerialError(f"Serial read error: {e}")
+        if not chunk:
+            # Readable but empty means the device went away
+            raise SerialError("Serial device disconnected")
+        self._rx_buf += chunk
+    
+    async def write_raw_async(self, data: bytes) -> None:
+        """Asyncio counterpart of write_raw().
+        
+        Args:
+            data: Raw bytes to send.
+        """
+        if not _POSIX:
+            await asyncio.get_running_loop().run_in_executor(self.executor, self.write_raw, data)
+            return
+            
+        if not self.is_connected:
+            raise SerialError("Not connected to serial device")
+        async with self._get_async_lock(), self._holding(self._lock):
+            await self._write_async(data)
+    
+    async def read_line_async(self, encoding: str = 'utf-8') -> str:
+        """Asyncio counterpart of read_line().
+        
+        Args:
+            encoding: Text encoding to use.
+            
+        Returns:
+            Line read from the port, with newline stripped.
+        """
+        self._require_not_listening()
+        if not _POSIX:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, self.read_line, encoding)
+            
+        if not self.is_connected:
+            raise SerialError("Not connected to serial device")
+        self._require_text_mode()
+        async with self._get_async_lock(), self._holding(self._rx_lock):
+            self._require_not_listening()
+            line = await self._read_async(self._take_line)
+        try:
+            return line.decode(encoding)
+        except UnicodeDecodeError as e:
+            raise SerialError(f"Serial read error: {e}")
+    
+    async def send_command_async(self, command: str, **kwargs) -> str:
+        """Asyncio counterpart of send_command().
+        
+        Args:
+            command: Command string to send.
+            **kwargs: Additional parameters to include in command.
+            
+        Returns:
+            Response string from the device.
+        """
+        return await self._retry_async(self._send_command_once_async, command, kwargs)
+    
+    async def _send_command_once_async(self, command: str, kwargs: Dict[str, Any]) -> str:
+        """Asyncio counterpart of _send_command_once()."""
+        self._require_text_mode()
+        self._require_not_listening()
+        if not _POSIX:
+            return await asyncio.get_running_loop().run_in_executor(
+                self.executor, self._send_command_once, command, kwargs
+            )
+            
+        if kwargs:
+            data = _dumps({'command': command, **kwargs}) + b'\n'
+        else:
+            data = command.encode('utf-8') + b'\n'
+        if not self.is_connected:
+            raise SerialError("Not connected to serial device")
+        # One exchange under one lock, so concurrent commands cannot swap replies
+        async with self._get_async_lock(), self._holding(self._rx_lock):
+            self._require_not_listening()
+            async with self._holding(self._lock):
+                await self._write_async(data)
+            try:
+                line = await self._read_async(self._take_line)
+            except SerialError:
+                self._rx_buf.clear()
+                raise
+        try:
+            return line.decode('utf-8')
+        except UnicodeDecodeError as e:
+            raise SerialError(f"Serial read error: {e}")
+    
+    async def send_json_command_async(self, command_dict: Dict[str, Any]) -> Dict[str, Any]:
+        """Asyncio counterpart of send_json_command().
+        
+        Args:
+            command_dict: Command dictionary to send.
+            
+        Returns:
+            Parsed response dictionary.
+        """
+        response = await self._retry_async(self._exchange_async, command_dict)
+        if not isinstance(response, dict):
+            raise SerialError(f"Unexpected response: {response!r}")
+        self._follow_disconnect((command_dict,), (response,))
+        return response
+    
+    async def _retry_async(self, call: Callable[..., Any], *args: Any) -> Any:
+        """Asyncio counterpart of _retry().
+        
+        While listening, only devices that echo ids get retries: with
+        replies matched in order, the late reply to the first attempt would
+        answer the retry (or another pending command).
+        """
+        attempt = 0
+        while True:
+            try:
+                return await call(*args)
+            except SerialTimeoutError as e:
+                if attempt >= self.retry_count or (self._listening and not self._ids_echoed):
+                    raise
+                logger.warning(f"{e} on {self.port}, retrying ({attempt + 1}/{self.retry_count})")
+                await asyncio.sleep(self.retry_backoff * 2 ** attempt)
+                # While listening, late replies carry the old id and are dropped
+                if not self._listening:
+                    async with self._get_async_lock():
+                        await asyncio.get_running_loop().run_in_executor(self.executor, self._reset_input)
+                attempt += 1
+    
+    async def send_batch_async(self, commands: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Asyncio counterpart of send_batch().
+        
+        Args:
+            commands: Command dictionaries to send.
+            
+        Returns:
+            Parsed response dictionaries, one per command.
+        """
+        responses = await self._exchange_async(list(commands))
+        if not isinstance(responses, list) or len(responses) != len(commands):
+            raise SerialError(f"Device did not return a batch response: {responses!r}")
+        self._follow_disconnect(commands, responses)
+        return responses
+    
+    async def _exchange_async(self, message: Any) -> Any:
+        """Send a message and await the reply without leaving the event loop.
+        
+        On POSIX the port's file descriptor is watched with the loop's
+        add_reader/add_writer, so no executor thread is involved. Elsewhere
+        the blocking exchange runs in self.executor.
+        """
+        if self._listening:
+            return await self._request(message)
+            
+        loop = asyncio.get_running_loop()
+        if not _POSIX:
+            return await loop.run_in_executor(self.executor, self._exchange, message)
+            
+        if not self.is_connected:
+            raise SerialError("Not connected to serial device")
+        async with self._get_async_lock(), self._holding(self._rx_lock):
+            if not self._listening:
+                async with self._holding(self._lock):
+                    await self._write_async(self._encode_frame(message))
+                try:
+                    return await self._read_async(self._take_message)
+                except SerialError:
+                    # Drop any partial reply so the next exchange starts clean
+                    self._rx_buf.clear()
+                    raise
+        # start_listening() got the lock first
+        return await self._request(message)
+    
+    async def start_listening(self, on_event: Optional[Callable[[Any], None]] = None) -> None:
+        """Receive in the background and hand unsolicited messages to `on_event`.
+        
+        While listening, incoming data is read as it arrives instead of
+        after each command. Every async command is tagged with an increasing
+        "id" (a batch is sent as {"id": ..., "batch": [...]} and answered
+        as {"id": ..., "batch": [...]}), and the reply carrying the same
+        "id" resolves it, so several commands can be in flight at once.
+        Until some reply has carried an "id", replies without one (from
+        firmware that does not echo it) are matched to the oldest pending
+        command. Any other message, for example pushed telemetry, is passed
+        to `on_event` on the event loop.
+        
+        Matching in order cannot tell a late reply from a current one: with
+        firmware that does not echo ids, the late reply to a command that
+        timed out answers the next pending command, so commands are not
+        retried and a timeout should be treated as fatal for the session.
+        
+        While listening, only send_json_command_async(), send_batch_async()
+        and write_raw_async() may be used; everything else that reads from
+        the port, and disconnect(), raises SerialError until stop_listening().
+        
+        Args:
+            on_event: Called with each unsolicited message.
+        """
+        if not self.is_connected:
+            raise SerialError("Not connected to serial device")
+        self._on_event = on_event
+        if self._listening:
+            return
+            
+        # Wait for an exchange that is already reading the port: the
+        # listener's reader would replace its reader, and its cleanup would
+        # then remove the listener's
+        async with self._get_async_lock(), self._holding(self._rx_lock):
+            if self._listening:
+                return
+            if not self.is_connected:
+                raise SerialError("Not connected to serial device")
+            self._ids_echoed = False
+            loop = asyncio.get_running_loop()
+            if _POSIX:
+                loop.add_reader(self._fd, self._on_readable)
+            else:
+                self._rx_task = loop.create_task(self._rx_loop())
+            self._listening = True
+    
+    async def stop_listening(self) -> None:
+        """Stop background receiving; commands still waiting for a reply fail."""
+        if not self._listening:
+            return
+        self._stop_receiving(SerialError("Stopped listening"))
+        if self._rx_task is not None:
+            self._rx_task.cancel()
+            try:
+                await self._rx_task
+            except asyncio.CancelledError:
+                pass
+            self._rx_task = None
+    
+    def _stop_receiving(self, error: SerialError) -> None:
+        """Detach the background receiver and fail all pending commands."""
+        self._listening = False
+        if _POSIX and self._fd is not None:
+            asyncio.get_running_loop().remove_reader(self._fd)
+        pending, self._pending = self._pending, {}
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(error)
+    
+    async def _request(self, message: Any) -> Any:
+        """Send a message while listening and await its correlated reply."""
+        command_id = next(self._next_id)
+        batch = isinstance(message, list)
+        if batch:
+            # A bare list has nowhere to carry the id
+            message = {"id": command_id, "batch": message}
+        elif isinstance(message, dict):
+            message = {**message, "id": command_id}
+            
+        future = asyncio.get_running_loop().create_future()
+        self._pending[command_id] = future
+        try:
+            await self.write_raw_async(self._encode_frame(message))
+            reply = await asyncio.wait_for(future, self.timeout)
+            if batch and isinstance(reply, dict) and "batch" in reply:
+                return reply["batch"]
+            return reply
+        except asyncio.TimeoutError:
+            raise SerialTimeoutError("Read timeout")
+        finally:
+            self._pending.pop(command_id, None)
+    
+    def _on_readable(self) -> None:
+        """Event loop reader callback: buffer new data and dispatch messages."""
+        try:
+            self._read_available(self._fd)
+        except SerialError as e:
+            self._stop_receiving(e)
+            return
+        self._dispatch_buffered()
+    
+    async def _rx_loop(self) -> None:
+        """Background receiver for platforms without add_reader() on the port."""
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                # Blocks for up to the timeout, so keep it off self.executor
+                await loop.run_in_executor(None, self._wait_input)
+            except SerialError as e:
+                self._stop_receiving(e)
+                return
+            self._dispatch_buffered()
+    
+    def _wait_input(self) -> None:
+        """Block until some input has been buffered or the read timeout passes."""
+        with self._rx_lock:
+            try:
+                self._fill_rx_buf(time.monotonic() + self.timeout)
+            except SerialTimeoutError:
+                pass
+    
+    def _dispatch_buffered(self) -> None:
+        """Route every complete message in the receive buffer."""
+        while True:
+            try:
+                message = self._take_message()
+            except SerialError as e:
+                # Framing is lost; start over and fail whoever was waiting
+                self._rx_buf.clear()
+                pending, self._pending = self._pending, {}
+                for future in pending.values():
+                    if not future.done():
+                        future.set_exception(e)
+                return
+            if message is _INCOMPLETE:
+                return
+            self._dispatch(message)
+    
+    def _dispatch(self, message: Any) -> None:
+        """Resolve the command a message answers, or pass it to on_event."""
+        pending = self._pending
+        future = None
+        if isinstance(message, dict) and "id" in message:
+            self._ids_echoed = True
+            command_id = message["id"]
+            if isinstance(command_id, int):
+                future = pending.pop(command_id, None)
+            if future is None:
+                logger.debug(f"Dropping reply to unknown command id {command_id!r}")
+                return
+        elif pending and not self._ids_echoed and (
+            isinstance(message, list) or (isinstance(message, dict) and "status" in message)
+        ):
+            # Firmware without id support answers in request order. Once ids
+            # are echoed, an id-less message is never a reply.
+            future = pending.pop(next(iter(pending)))
+            
+        if future is None:
+            if self._on_event is not None:
+                try:
+                    self._on_event(message)
+                except Exception as e:
+                    logger.error(f"Error in serial event callback: {e}")
+            return
+            
+        if not future.done():
+            future.set_result(message)
+    
+    async def _write_async(self, data: bytes) -> None:
+        """Write all of `data` to the port, waiting for it to become writable."""
+        loop = asyncio.get_running_loop()
+        fd = self._fd
+        deadline = loop.time() + self.write_timeout
+        view = memoryview(data)
+        while view:
+            try:
+                view = view[os.write(fd, view):]
+            except BlockingIOError:
+                pass
+            except OSError as e:
+                raise SerialError(f"Serial write error: {e}")
+            if view:
+                await self._wait_fd(loop.add_writer, loop.remove_writer, fd, deadline, "Write timeout")
+    
+    def _get_async_lock(self) -> asyncio.Lock:
+        """Lock serializing asyncio exchanges, created on first use inside a loop."""
+        if self._async_lock is None:
+            self._async_lock = asyncio.Lock()
+        return self._async_lock
+    
+    @asynccontextmanager
+    async def _holding(self, lock: Lock) -> AsyncIterator[None]:
+        """Hold one of the handler's threading locks from the event loop.
+        
+        The async I/O paths take the same _lock/_rx_lock as the sync
+        methods, so both can share a handler. The lock is normally free and
+        costs a single non-blocking acquire. While a worker thread holds it
+        (a sync exchange can hold _rx_lock for the whole read timeout), the
+        coroutine polls with a backoff from 1 ms up to 50 ms rather than
+        stalling the event loop.
+        
+        Sync methods must therefore run in a worker thread, never on the
+        event loop thread: if one blocks on a lock a coroutine holds, the
+        loop can never resume that coroutine to release it.
+        """
+        delay = 0.001
+        while not lock.acquire(blocking=False):
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.05)
+        try:
+            yield
+        finally:
+            lock.release()
+    
+    async def _read_async(self, take: Callable[[], Any]) -> Any:
+        """Read from the port until `take` can pop a complete item off the receive buffer."""
+        loop = asyncio.get_running_loop()
+        fd = self._fd
+        deadline = loop.time() + self.timeout
+        while True:
+            message = take()
+            if message is not _INCOMPLETE:
+                return message
+                
+            await self._wait_fd(loop.add_reader, loop.remove_reader, fd, deadline, "Read timeout")
+            self._read_available(fd)
+    
+    @staticmethod
+    async def _wait_fd(add: Any, remove: Any, fd: int, deadline: float, timeout_message: str) -> None:
+        """Wait until `fd` is ready, using an event loop add_reader/add_writer pair."""
+        loop = asyncio.get_running_loop()
+        ready = loop.create_future()
+        add(fd, lambda: ready.done() or ready.set_result(None))
+        try:
+            await asyncio.wait_for(ready, max(0.0, deadline - loop.time()))
+        except asyncio.TimeoutError:
+            raise SerialTimeoutError(timeout_message)
+        finally:
+            remove(fd)
+    
+    def set_wire_format(self, wire_format: str, framing: str = "line") -> None:
+        """Negotiate the wire format and framing with the device.
+        
+        The SET_WIRE request and its reply use the current format; both ends
+        switch once the reply has been received. Devices that do not know
+        SET_WIRE reply with an error and the link stays on line-based JSON.
+        
+        Args:
+            wire_format: One of WIRE_FORMATS.
+            framing: One of FRAMINGS.
+        """
+        if wire_format not in self.WIRE_FORMATS:
+            raise ValueError(f"Unsupported wire format: {wire_format}")
+        if framing not in self.FRAMINGS:
+            raise ValueError(f"Unsupported framing: {framing}")
+        if wire_format == "cbor" and cbor2 is None:
+            raise SerialError("The cbor2 package is required for the CBOR wire format")
+        if (wire_format, framing) == (self.wire_format, self.framing):
+            return
+            
+        # Not retried: a device that ignores SET_WIRE would only time out again
+        response = self._exchange(
+            {"command": "SET_WIRE", "format": wire_format, "framing": framing}
+        )
+        if not isinstance(response, dict):
+            raise SerialError(f"Unexpected response: {response!r}")
+        if response.get("status") != "success":
+            raise SerialError(f"Device rejected wire format '{wire_format}': {response.get('message')}")
+        self.wire_format = wire_format
+        self.framing = framing
+    
+    def send_raw_json_bytes(self, payload: bytes) -> Dict[str, Any]:
+        """Send a pre-encoded command and parse the response.
+        
+        Args:
+            payload: Command encoded in the active wire format (JSON unless
+                CBOR was negotiated), without framing.
+            
+        Returns:
+            Parsed response dictionary.
+        """
+        response = self._exchange_frames(self._frame(payload), 1)[0]
+        if not isinstance(response, dict):
+            raise SerialError(f"Unexpected response: {response!r}")
+        return response
+    
     def __enter__(self):
         """Context manager entry."""
         self.connect()
@@ -292,9 +1393,12 @@ class SerialHandler:
         """Context manager exit."""
         self.disconnect()
     
-    def __del__(self):
-        """Cleanup on deletion."""
-        try:
-            self.disconnect()
-        except Exception:
-            pass
\ No newline at end of file
+    async def __aenter__(self):
+        """Async context manager entry."""
+        await asyncio.get_running_loop().run_in_executor(self.executor, self.connect)
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """Async context manager exit."""
+        await self.stop_listening()
+        await asyncio.get_running_loop().run_in_executor(self.executor, self.disconnect)
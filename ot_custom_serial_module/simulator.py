@@ -1,9 +1,8 @@
 """Mock hardware simulator for development and testing."""
 
-import json
 import logging
 import time
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List
 
 logger = logging.getLogger(__name__)
 
@@ -11,6 +10,19 @@ logger = logging.getLogger(__name__)
 class MockSerialDevice:
     """Mock serial device for testing without hardware."""
     
+    __slots__ = (
+        "device_name",
+        "firmware_version",
+        "is_connected",
+        "wire_format",
+        "framing",
+        "parameters",
+        "temperature",
+        "humidity",
+        "uptime",
+        "_start_time",
+    )
+    
     def __init__(self, device_name: str = "MockDevice", firmware_version: str = "1.0.0"):
         """Initialize mock device.
         
@@ -21,13 +33,22 @@ class MockSerialDevice:
         self.device_name = device_name
         self.firmware_version = firmware_version
         self.is_connected = False
+        self.wire_format = "json"
+        self.framing = "line"
         self.parameters = {}
-        self.status_data = {
-            "temperature": 25.0,
-            "humidity": 50.0,
-            "uptime": 0,
+        self.temperature = 25.0
+        self.humidity = 50.0
+        self.uptime = 0
+        self._start_time = time.monotonic()
+    
+    @property
+    def status_data(self) -> Dict[str, Any]:
+        """Simulated sensor values as a dictionary."""
+        return {
+            "temperature": self.temperature,
+            "humidity": self.humidity,
+            "uptime": self.uptime,
         }
-        self._start_time = time.time()
     
     def handle_command(self, command_dict: Dict[str, Any]) -> Dict[str, Any]:
         """Handle incoming command and return response.
@@ -40,24 +61,12 @@ class MockSerialDevice:
         """
         command = command_dict.get("command", "").upper()
         
-        if command == "CONNECT":
-            return self._handle_connect()
-        elif command == "DISCONNECT":
-            return self._handle_disconnect()
-        elif command == "STATUS":
-            return self._handle_status()
-        elif command == "RESET":
-            return self._handle_reset()
-        elif command == "GET_VERSION":
-            return self._handle_get_version()
-        elif command == "SET_PARAMETER":
-            return self._handle_set_parameter(command_dict)
-        elif command == "GET_PARAMETER":
-            return self._handle_get_parameter(command_dict)
-        else:
+        handler = self._HANDLERS.get(command)
+        if handler is None:
             return self._handle_unknown_command(command)
+        return handler(self, command_dict)
     
-    def _handle_connect(self) -> Dict[str, Any]:
+    def _handle_connect(self, command_dict: Dict[str, Any]) -> Dict[str, Any]:
         """Handle connect command."""
         self.is_connected = True
         return {
@@ -69,44 +78,50 @@ class MockSerialDevice:
             }
         }
     
-    def _handle_disconnect(self) -> Dict[str, Any]:
+    def _handle_disconnect(self, command_dict: Dict[str, Any]) -> Dict[str, Any]:
         """Handle disconnect command."""
         self.is_connected = False
+        # Like the firmware, go back to line-based JSON for the next session
+        self.wire_format = "json"
+        self.framing = "line"
         return {
             "status": "success",
             "message": f"Disconnected from {self.device_name}"
         }
     
-    def _handle_status(self) -> Dict[str, Any]:
+    def _handle_status(self, command_dict: Dict[str, Any]) -> Dict[str, Any]:
         """Handle status command."""
         # Update uptime
-        self.status_data["uptime"] = int(time.time() - self._start_time)
+        self.uptime = int(time.monotonic() - self._start_time)
         
-        # Simulate some changing values
-        self.status_data["temperature"] = 25.0 + (time.time() % 10) - 5
-        self.status_data["humidity"] = 50.0 + (time.time() % 20) - 10
+        # Simulate some changing values from a single wall-clock sample
+        now = time.time()
+        self.temperature = 25.0 + (now % 10) - 5
+        self.humidity = 50.0 + (now % 20) - 10
         
         return {
             "status": "success",
             "message": "Device status retrieved",
             "data": {
                 "connected": self.is_connected,
-                **self.status_data
+                "temperature": self.temperature,
+                "humidity": self.humidity,
+                "uptime": self.uptime,
             }
         }
     
-    def _handle_reset(self) -> Dict[str, Any]:
+    def _handle_reset(self, command_dict: Dict[str, Any]) -> Dict[str, Any]:
         """Handle reset command."""
         self.parameters.clear()
-        self._start_time = time.time()
-        self.status_data["uptime"] = 0
+        self._start_time = time.monotonic()
+        self.uptime = 0
         
         return {
             "status": "success",
             "message": f"{self.device_name} reset successfully"
         }
     
-    def _handle_get_version(self) -> Dict[str, Any]:
+    def _handle_get_version(self, command_dict: Dict[str, Any]) -> Dict[str, Any]:
         """Handle get version command."""
         return {
             "status": "success",
@@ -166,12 +181,53 @@ class MockSerialDevice:
             }
         }
     
+    def _handle_set_wire(self, command_dict: Dict[str, Any]) -> Dict[str, Any]:
+        """Handle wire format negotiation."""
+        wire_format = command_dict.get("format", "json")
+        framing = command_dict.get("framing", "line")
+        
+        if wire_format not in ("json", "cbor"):
+            return {
+                "status": "error",
+                "message": f"Unsupported wire format: {wire_format}"
+            }
+        
+        if framing not in ("line", "length"):
+            return {
+                "status": "error",
+                "message": f"Unsupported framing: {framing}"
+            }
+        
+        self.wire_format = wire_format
+        self.framing = framing
+        
+        return {
+            "status": "success",
+            "message": f"Wire format set to {wire_format} ({framing} framing)",
+            "data": {
+                "format": wire_format,
+                "framing": framing
+            }
+        }
+    
     def _handle_unknown_command(self, command: str) -> Dict[str, Any]:
         """Handle unknown command."""
         return {
             "status": "error",
             "message": f"Unknown command: {command}"
         }
+    
+    # Command name -> handler, looked up once per command by handle_command()
+    _HANDLERS = {
+        "CONNECT": _handle_connect,
+        "DISCONNECT": _handle_disconnect,
+        "STATUS": _handle_status,
+        "RESET": _handle_reset,
+        "GET_VERSION": _handle_get_version,
+        "SET_PARAMETER": _handle_set_parameter,
+        "GET_PARAMETER": _handle_get_parameter,
+        "SET_WIRE": _handle_set_wire,
+    }
 
 
 class MockSerialHandler:
@@ -211,8 +267,41 @@ class MockSerialHandler:
                 "message": "Not connected to device"
             }
         
-        logger.debug(f"Mock device received command: {command_dict}")
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            logger.debug(f"Mock device received command: {command_dict}")
         response = self.mock_device.handle_command(command_dict)
-        logger.debug(f"Mock device response: {response}")
+        if debug:
+            logger.debug(f"Mock device response: {response}")
+        
+        return response
+    
+    def send_batch(self, commands: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Send a batch of commands to mock device.
         
-        return response
\ No newline at end of file
+        Args:
+            commands: Command dictionaries
+            
+        Returns:
+            Response dictionaries from mock device, one per command
+        """
+        return [self.send_json_command(command_dict) for command_dict in commands]
+    
+    def send_commands_batch(self, commands: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Send several commands back to back to mock device.
+        
+        Args:
+            commands: Command dictionaries
+            
+        Returns:
+            Response dictionaries from mock device, one per command
+        """
+        return [self.send_json_command(command_dict) for command_dict in commands]
+    
+    async def send_json_command_async(self, command_dict: Dict[str, Any]) -> Dict[str, Any]:
+        """Asyncio counterpart of send_json_command()."""
+        return self.send_json_command(command_dict)
+    
+    async def send_batch_async(self, commands: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Asyncio counterpart of send_batch()."""
+        return self.send_batch(commands)
\ No newline at end of file
@@ -0,0 +1,46 @@
+"""Tests for CustomSerialModule in simulation mode."""
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("opentrons")
+try:
+    from ot_custom_serial_module.module import CustomSerialModule
+except (ImportError, AttributeError) as e:
+    # Needs an Opentrons build that defines ModuleType.CUSTOM_SERIAL
+    pytest.skip(f"Opentrons integration unavailable: {e}", allow_module_level=True)
+
+
+async def build_simulated():
+    return await CustomSerialModule.build(
+        port="virtual",
+        usb_port=None,
+        execution_manager=None,
+        hw_control_loop=asyncio.get_running_loop(),
+    )
+
+
+def test_batch_resolves_futures_in_order():
+    async def run():
+        module = await build_simulated()
+        async with module.batch() as batch:
+            started = batch.send_command("START_MEASUREMENT", duration=30)
+            blinked = batch.send_command("BLINK_LED", count=3)
+            assert not started.done()
+        assert started.result()["data"] == {"duration": 30}
+        assert blinked.result()["message"] == "Simulated command: BLINK_LED"
+
+    asyncio.run(run())
+
+
+def test_batch_cancels_futures_on_error():
+    async def run():
+        module = await build_simulated()
+        with pytest.raises(RuntimeError):
+            async with module.batch() as batch:
+                queued = batch.send_command("STATUS")
+                raise RuntimeError("abort")
+        assert queued.cancelled()
+
+    asyncio.run(run())
@@ -0,0 +1,468 @@
+"""Tests for SerialHandler against a fake device on a pseudo-terminal."""
+
+import asyncio
+import io
+import json
+import os
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+pty = pytest.importorskip("pty")
+tty = pytest.importorskip("tty")
+
+# Import the handler directly: the package __init__ pulls in the Opentrons module
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "ot_custom_serial_module"))
+
+from serial_handler import SerialError, SerialHandler, SerialTimeoutError  # noqa: E402
+
+try:
+    import cbor2
+except ImportError:
+    cbor2 = None
+
+
+def echo(command):
+    """Default device behaviour: answer every command with itself as data."""
+    if isinstance(command, list):
+        return [echo(item) for item in command]
+    if isinstance(command, dict) and "batch" in command:
+        return {"batch": echo(command["batch"])}
+    return {"status": "success", "message": "ok", "data": command}
+
+
+class _MasterIO(io.RawIOBase):
+    """Raw binary stream over the master side of the pty."""
+
+    def __init__(self, fd):
+        self.fd = fd
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        data = os.read(self.fd, len(b))
+        b[:len(data)] = data
+        return len(data)
+
+
+class FakeDevice:
+    """Firmware stand-in speaking the handler's protocol over a pty.
+
+    `reply` maps each received command to its response, or to None to
+    stay silent. Like the example firmware, replies echo the command's
+    "id", a successful SET_WIRE switches format after its reply and
+    DISCONNECT switches back to json/line.
+    """
+
+    def __init__(self, reply=echo, framing="line", echo_ids=True):
+        self.master, self._slave = pty.openpty()
+        tty.setraw(self._slave)
+        self.port = os.ttyname(self._slave)
+        self.reply = reply
+        self.wire_format = "json"
+        self.framing = framing
+        self.echo_ids = echo_ids
+        self.received = []
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def close(self):
+        os.close(self.master)
+        os.close(self._slave)
+
+    def send(self, message):
+        """Write one message in the device's current format and framing."""
+        if self.wire_format == "cbor":
+            data = cbor2.dumps(message)
+        else:
+            data = json.dumps(message).encode()
+        if self.framing == "length":
+            data = len(data).to_bytes(4, "little") + data
+        elif self.wire_format == "json":
+            data += b"\n"
+        os.write(self.master, data)
+
+    def _read_command(self, stream):
+        if self.framing == "length":
+            size = int.from_bytes(stream.read(4), "little")
+            payload = stream.read(size)
+            return cbor2.loads(payload) if self.wire_format == "cbor" else json.loads(payload)
+        if self.wire_format == "cbor":
+            return cbor2.load(stream)
+        line = stream.readline()
+        if not line:
+            raise EOFError
+        try:
+            return json.loads(line)
+        except ValueError:
+            # A plain text command, as sent by send_command()
+            return line.rstrip(b"\r\n").decode()
+
+    def _run(self):
+        stream = io.BufferedReader(_MasterIO(self.master))
+        while True:
+            try:
+                command = self._read_command(stream)
+            except (OSError, ValueError, EOFError):
+                return
+            self.received.append(command)
+            response = self.reply(command)
+            if response is None:
+                continue
+            if self.echo_ids and isinstance(command, dict) and "id" in command:
+                response = {**response, "id": command["id"]}
+            self.send(response)
+            if not isinstance(command, dict) or not isinstance(response, dict):
+                continue
+            if command.get("command") == "SET_WIRE" and response.get("status") == "success":
+                self.wire_format = command["format"]
+                self.framing = command["framing"]
+            elif command.get("command") == "DISCONNECT":
+                self.wire_format = "json"
+                self.framing = "line"
+
+
+@pytest.fixture
+def device():
+    device = FakeDevice()
+    yield device
+    device.close()
+
+
+@pytest.fixture
+def length_device():
+    device = FakeDevice(framing="length")
+    yield device
+    device.close()
+
+
+def open_handler(device, **kwargs):
+    kwargs.setdefault("timeout", 0.5)
+    handler = SerialHandler(port=device.port, auto_discover=False, low_latency=False, **kwargs)
+    handler.connect()
+    return handler
+
+
+@pytest.fixture
+def comports(monkeypatch):
+    """Count port enumerations, reporting one fake Pi Pico."""
+    from serial.tools import list_ports
+
+    calls = []
+
+    def fake_comports():
+        calls.append(None)
+        return [SimpleNamespace(
+            device="/dev/ttyACM0", description="Pico", hwid="USB VID:PID=2E8A:0005",
+            vid=0x2E8A, pid=0x0005, serial_number="1", manufacturer="RPi", product="Pico",
+        )]
+
+    monkeypatch.setattr(list_ports, "comports", fake_comports)
+    SerialHandler.invalidate_device_cache()
+    yield calls
+    SerialHandler.invalidate_device_cache()
+
+
+def test_port_enumeration_is_cached(comports, monkeypatch):
+    monkeypatch.setattr(SerialHandler, "DEVICE_CACHE_TTL", 0.05)
+    handler = SerialHandler(auto_discover=True, vid_pid_filter=[(0x2E8A, 0x0005)])
+    assert handler.auto_discover_port() == "/dev/ttyACM0"
+    # Shared by all handlers until the TTL runs out
+    assert SerialHandler().discover_devices()[0]["product"] == "Pico"
+    assert len(comports) == 1
+
+    time.sleep(0.06)
+    handler.discover_devices()
+    assert len(comports) == 2
+
+
+def test_invalidate_device_cache_forces_rescan(comports):
+    handler = SerialHandler()
+    handler.discover_devices()
+    handler.discover_devices()
+    assert len(comports) == 1
+
+    SerialHandler.invalidate_device_cache()
+    handler.discover_devices()
+    assert len(comports) == 2
+
+
+def test_failed_connect_invalidates_device_cache(comports, tmp_path):
+    handler = SerialHandler(port=str(tmp_path / "missing"), auto_discover=False, low_latency=False)
+    handler.discover_devices()
+    with pytest.raises(SerialError):
+        handler.connect()
+    handler.discover_devices()
+    assert len(comports) == 2
+
+
+def test_discovered_devices_are_copies(comports):
+    SerialHandler().discover_devices()[0]["device"] = "changed"
+    assert SerialHandler().discover_devices()[0]["device"] == "/dev/ttyACM0"
+
+
+def test_length_frame_round_trip(length_device):
+    with open_handler(length_device, framing="length") as handler:
+        handler.send_framed(json.dumps({"command": "PING"}).encode())
+        assert json.loads(handler.recv_framed())["data"] == {"command": "PING"}
+
+        response = handler.send_json_command({"command": "STATUS", "text": "a\nb"})
+        assert response["data"] == {"command": "STATUS", "text": "a\nb"}
+
+
+def test_send_raw_json_bytes(length_device):
+    with open_handler(length_device, framing="length") as handler:
+        response = handler.send_raw_json_bytes(b'{"command": "PING"}')
+        assert response["data"] == {"command": "PING"}
+
+        length_device.reply = lambda command: [command]
+        with pytest.raises(SerialError, match="Unexpected response"):
+            handler.send_raw_json_bytes(b'{"command": "PING"}')
+
+
+def test_oversize_frame_is_rejected(length_device):
+    with open_handler(length_device, framing="length") as handler:
+        os.write(length_device.master, (SerialHandler.MAX_FRAME_SIZE + 1).to_bytes(4, "little"))
+        with pytest.raises(SerialError, match="too large"):
+            handler.read_frame()
+
+
+def test_text_methods_refuse_length_framing(length_device):
+    with open_handler(length_device, framing="length") as handler:
+        with pytest.raises(SerialError):
+            handler.write_line("STATUS")
+        with pytest.raises(SerialError):
+            handler.send_command("STATUS")
+
+
+def test_set_wire_switches_both_ends(device):
+    with open_handler(device) as handler:
+        handler.set_wire_format("json", framing="length")
+        assert (handler.wire_format, handler.framing) == ("json", "length")
+        # The device switches only after writing its reply
+        deadline = time.monotonic() + 1
+        while device.framing != "length" and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert device.framing == "length"
+
+        response = handler.send_json_command({"command": "STATUS"})
+        assert response["data"] == {"command": "STATUS"}
+    # disconnect() puts the handler back on the default framing
+    assert handler.framing == "line"
+
+
+@pytest.mark.skipif(cbor2 is None, reason="cbor2 is not installed")
+def test_set_wire_to_cbor(device):
+    with open_handler(device) as handler:
+        handler.set_wire_format("cbor", framing="length")
+        response = handler.send_json_command({"command": "STATUS", "raw": b"\x00\n"})
+        assert device.wire_format == "cbor"
+        assert response["data"] == {"command": "STATUS", "raw": b"\x00\n"}
+
+
+def test_disconnect_command_resets_wire_format(device):
+    with open_handler(device) as handler:
+        handler.set_wire_format("json", framing="length")
+        assert handler.send_json_command({"command": "DISCONNECT"})["status"] == "success"
+        assert (handler.wire_format, handler.framing) == ("json", "line")
+        assert handler.send_json_command({"command": "STATUS"})["data"] == {"command": "STATUS"}
+
+
+def test_rejected_set_wire_keeps_line_json(device):
+    def reply(command):
+        if command["command"] == "SET_WIRE":
+            return {"status": "error", "message": "Unknown command: SET_WIRE"}
+        return echo(command)
+    device.reply = reply
+
+    with open_handler(device) as handler:
+        with pytest.raises(SerialError, match="rejected"):
+            handler.set_wire_format("json", framing="length")
+        assert (handler.wire_format, handler.framing) == ("json", "line")
+        assert handler.send_json_command({"command": "STATUS"})["status"] == "success"
+
+
+def test_batch_round_trip(device):
+    commands = [{"command": "A"}, {"command": "B", "n": 1}]
+    with open_handler(device) as handler:
+        responses = handler.send_batch(commands)
+        assert [response["data"] for response in responses] == commands
+        # The whole batch went out as one message
+        assert device.received == [commands]
+        assert asyncio.run(handler.send_batch_async(commands)) == responses
+
+
+def test_batch_needs_a_list_reply(device):
+    device.reply = lambda command: echo(command[0])
+    with open_handler(device) as handler:
+        with pytest.raises(SerialError, match="batch response"):
+            handler.send_batch([{"command": "A"}, {"command": "B"}])
+
+
+def test_commands_batch_pipelines_separate_messages(device):
+    commands = [{"command": "A"}, {"command": "B"}, {"command": "C", "n": 2}]
+    with open_handler(device) as handler:
+        assert handler.send_commands_batch([]) == []
+        responses = handler.send_commands_batch(commands)
+    assert [response["data"] for response in responses] == commands
+    assert device.received == commands
+
+
+def test_commands_batch_with_length_framing(length_device):
+    commands = [{"command": "A"}, {"command": "B"}]
+    with open_handler(length_device, framing="length") as handler:
+        responses = handler.send_commands_batch(commands)
+    assert [response["data"] for response in responses] == commands
+
+
+def test_retry_after_timeout(device):
+    def reply(command):
+        # Drop the first attempt, as if the reply was lost on the wire
+        return echo(command) if len(device.received) > 1 else None
+    device.reply = reply
+
+    with open_handler(device, timeout=0.2, retry_count=1) as handler:
+        response = handler.send_json_command({"command": "STATUS"})
+    assert response["data"] == {"command": "STATUS"}
+    assert device.received == [{"command": "STATUS"}] * 2
+
+
+def test_no_retry_by_default(device):
+    device.reply = lambda command: None
+
+    with open_handler(device, timeout=0.2) as handler:
+        with pytest.raises(SerialTimeoutError):
+            handler.send_json_command({"command": "STATUS"})
+    assert len(device.received) == 1
+
+
+def test_listening_correlates_replies_by_id(device):
+    held = []
+
+    def reply(command):
+        # Answer out of order, with a pushed event in between
+        if not held:
+            held.append(command)
+            return None
+        device.send({**echo(command), "id": command["id"]})
+        device.send({"event": "tick"})
+        device.send({**echo(held[0]), "id": held[0]["id"]})
+        return None
+    device.reply = reply
+
+    async def run(handler):
+        events = []
+        await handler.start_listening(events.append)
+        first = asyncio.ensure_future(handler.send_json_command_async({"command": "A"}))
+        await asyncio.sleep(0.05)
+        second = await handler.send_json_command_async({"command": "B"})
+        assert (await first)["data"]["command"] == "A"
+        assert second["data"]["command"] == "B"
+        assert events == [{"event": "tick"}]
+
+        device.reply = echo
+        responses = await handler.send_batch_async([{"command": "C"}, {"command": "D"}])
+        assert [response["data"]["command"] for response in responses] == ["C", "D"]
+
+        with pytest.raises(SerialError):
+            handler.disconnect()
+        await handler.stop_listening()
+
+    with open_handler(device) as handler:
+        asyncio.run(run(handler))
+
+
+def test_start_listening_waits_for_exchange_in_flight(device):
+    def reply(command):
+        if "id" not in command:
+            # Answer the unlisted exchange late, after listening was requested
+            threading.Timer(0.1, device.send, (echo(command),)).start()
+            return None
+        return echo(command)
+    device.reply = reply
+
+    async def run(handler):
+        in_flight = asyncio.ensure_future(handler.send_json_command_async({"command": "A"}))
+        await asyncio.sleep(0.02)
+        await handler.start_listening()
+        assert (await in_flight)["data"] == {"command": "A"}
+        # The listener's reader survived the exchange's cleanup
+        response = await handler.send_json_command_async({"command": "B"})
+        assert response["data"]["command"] == "B"
+        await handler.stop_listening()
+
+    with open_handler(device) as handler:
+        asyncio.run(run(handler))
+
+
+def test_no_retry_while_matching_replies_in_order():
+    device = FakeDevice(reply=lambda command: None, echo_ids=False)
+
+    async def run(handler):
+        await handler.start_listening()
+        with pytest.raises(SerialTimeoutError):
+            await handler.send_json_command_async({"command": "STATUS"})
+        await handler.stop_listening()
+
+    try:
+        with open_handler(device, timeout=0.2, retry_count=2) as handler:
+            asyncio.run(run(handler))
+        assert device.received == [{"command": "STATUS", "id": 1}]
+    finally:
+        device.close()
+
+
+def test_text_commands_async(device):
+    async def run(handler):
+        assert json.loads(await handler.send_command_async("PING"))["data"] == "PING"
+
+        replies = await asyncio.gather(
+            *[handler.send_command_async("SET", n=n) for n in range(10)]
+        )
+        assert [json.loads(reply)["data"]["n"] for reply in replies] == list(range(10))
+
+        device.send({"event": "tick"})
+        assert json.loads(await handler.read_line_async()) == {"event": "tick"}
+
+    with open_handler(device) as handler:
+        asyncio.run(run(handler))
+
+
+def test_async_waits_for_lock_held_by_thread(device):
+    async def run(handler):
+        handler._rx_lock.acquire()
+        threading.Timer(0.1, handler._rx_lock.release).start()
+        started = time.monotonic()
+        response = await handler.send_json_command_async({"command": "A"})
+        assert response["data"] == {"command": "A"}
+        assert time.monotonic() - started >= 0.1
+
+    with open_handler(device) as handler:
+        asyncio.run(run(handler))
+
+
+def test_sync_and_async_exchanges_share_a_handler(device):
+    mismatches = []
+
+    def sync_worker(handler):
+        for n in range(30):
+            response = handler.send_json_command({"command": "SYNC", "n": n})
+            if response["data"] != {"command": "SYNC", "n": n}:
+                mismatches.append(response)
+
+    async def run(handler):
+        loop = asyncio.get_running_loop()
+        worker = loop.run_in_executor(None, sync_worker, handler)
+        for n in range(30):
+            response = await handler.send_json_command_async({"command": "ASYNC", "n": n})
+            if response["data"] != {"command": "ASYNC", "n": n}:
+                mismatches.append(response)
+        await worker
+
+    with open_handler(device, timeout=2) as handler:
+        asyncio.run(run(handler))
+    assert mismatches == []
@@ -0,0 +1,29 @@
+"""Tests for the mock device and handler."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "ot_custom_serial_module"))
+
+from simulator import MockSerialHandler  # noqa: E402
+
+
+def test_constant_responses_are_copies():
+    handler = MockSerialHandler()
+    handler.connect()
+
+    response = handler.send_json_command({"command": "GET_VERSION"})
+    response["status"] = "changed"
+    response["data"]["device_name"] = "changed"
+
+    response = handler.send_json_command({"command": "GET_VERSION"})
+    assert response["status"] == "success"
+    assert response["data"]["device_name"] == "MockDevice"
+
+
+def test_batch_answers_each_command():
+    handler = MockSerialHandler()
+    handler.connect()
+
+    responses = handler.send_batch([{"command": "CONNECT"}, {"command": "NOPE"}])
+    assert [response["status"] for response in responses] == ["success", "error"]